@@ -0,0 +1,192 @@
+"""
+Benchmarks for the codec, discovery decoding and end-to-end polling.
+
+Usage (with the package installed, e.g. pip install -e .):
+    python benchmarks/bench.py --output bench.json
+    python benchmarks/bench.py --compare bench.json
+
+End-to-end numbers are measured against the bundled simulator on loopback.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+from importlib import metadata
+
+from envertech_local import (
+    InverterClient,
+    StreamSchedule,
+    build_inverter_break_command,
+    build_inverter_command,
+    build_inverter_powercontrol_command,
+    build_inverter_request,
+    get_inverter_data,
+    stream_inverter_data,
+)
+from envertech_local.discovery import decode_localcon_response, decode_wifi_response
+from envertech_local.simulator import InverterSimulator, VirtualInverter
+
+SERIAL = "30800000"
+MODULE_COUNTS = (1, 8, 32, 64)
+
+
+def measure(func, min_time=0.5):
+    """Call func repeatedly for at least min_time seconds and return calls/s."""
+    calls = 0
+    batch = 1
+    start = time.perf_counter()
+    while True:
+        for _ in range(batch):
+            func()
+        calls += batch
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return calls / elapsed
+        batch *= 2
+
+
+def bench_codec(min_time):
+    results = {}
+    client = InverterClient("127.0.0.1", 14889, SERIAL)
+    for count in MODULE_COUNTS:
+        frame = VirtualInverter(SERIAL, module_count=count, seed=0).data_frame()
+        results[f"parse_data_{count}_modules_frames_per_s"] = measure(lambda: client.parse_data(frame), min_time)
+        results[f"parse_reading_{count}_modules_frames_per_s"] = measure(lambda: client.parse_reading(frame), min_time)
+
+    # The build_* helpers return prebuilt frames after the first call, so
+    # build_inverter_command is measured separately for the uncached cost
+    results["build_inverter_command_per_s"] = measure(
+        lambda: build_inverter_command(SERIAL, 4215, payload_padding=20), min_time
+    )
+    results["build_inverter_request_per_s"] = measure(lambda: build_inverter_request(SERIAL), min_time)
+    results["build_inverter_break_command_per_s"] = measure(lambda: build_inverter_break_command(SERIAL), min_time)
+    results["build_inverter_powercontrol_command_per_s"] = measure(
+        lambda: build_inverter_powercontrol_command(SERIAL, 128), min_time
+    )
+    return results
+
+
+def bench_discovery(min_time):
+    device = VirtualInverter(SERIAL)
+    localcon = device.localcon_reply("192.168.178.5", 14889)
+    wifi = device.wifi_reply("192.168.178.5")
+    return {
+        "decode_localcon_response_per_s": measure(lambda: decode_localcon_response(localcon), min_time),
+        "decode_wifi_response_per_s": measure(lambda: decode_wifi_response(wifi), min_time),
+    }
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {
+        "p50_ms": statistics.median(samples) * 1000,
+        "p95_ms": samples[int(len(samples) * 0.95) - 1] * 1000,
+        "max_ms": samples[-1] * 1000,
+    }
+
+
+async def bench_end_to_end(polls, stream_updates, stream_interval):
+    results = {}
+    for count in (8, 64):
+        async with InverterSimulator([VirtualInverter(SERIAL, module_count=count, seed=0)]) as sim:
+            device = sim.device_list()[0]
+
+            latencies = []
+            for _ in range(polls):
+                start = time.perf_counter()
+                await get_inverter_data(device, port=sim.port)
+                latencies.append(time.perf_counter() - start)
+            for key, value in percentiles(latencies).items():
+                results[f"get_inverter_data_{count}_modules_{key}"] = value
+
+            # Paced like a real stream: one request in flight, a fixed interval.
+            # The rate tops out at 1 / stream_interval; the gaps show how
+            # closely the stream keeps to that pace.
+            schedule = StreamSchedule(max_in_flight=1, adaptive=False, start_jitter=0)
+            stream = stream_inverter_data(device, port=sim.port, interval=stream_interval, schedule=schedule)
+            gaps = []
+            received = 0
+            start = last = time.perf_counter()
+            try:
+                async for data in stream:
+                    if not data:
+                        continue
+                    now = time.perf_counter()
+                    if received:
+                        gaps.append(now - last)
+                    last = now
+                    received += 1
+                    if received >= stream_updates:
+                        break
+            finally:
+                await stream.aclose()
+            results[f"stream_inverter_data_{count}_modules_paced_updates_per_s"] = (
+                received / (time.perf_counter() - start)
+            )
+            for key, value in percentiles(gaps).items():
+                results[f"stream_inverter_data_{count}_modules_gap_{key}"] = value
+    return results
+
+
+def compare(current, baseline, threshold):
+    """Print metrics that got worse by more than threshold (a fraction)."""
+    regressions = 0
+    for name, value in current["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if not old:
+            continue
+        # Latencies should go down, everything else is a rate
+        change = (value - old) / old if name.endswith("_ms") else (old - value) / old
+        if change > threshold:
+            regressions += 1
+            print(f"REGRESSION {name}: {old:.1f} -> {value:.1f} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run envertech_local benchmarks")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", help="baseline JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before reporting a regression")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds per micro benchmark")
+    parser.add_argument("--polls", type=int, default=50)
+    parser.add_argument("--stream-updates", type=int, default=200)
+    parser.add_argument("--stream-interval", type=float, default=0.01, help="seconds between stream requests")
+    args = parser.parse_args()
+
+    results = {}
+    results.update(bench_codec(args.min_time))
+    results.update(bench_discovery(args.min_time))
+    results.update(asyncio.run(bench_end_to_end(args.polls, args.stream_updates, args.stream_interval)))
+
+    try:
+        version = metadata.version("envertech_local")
+    except metadata.PackageNotFoundError:
+        version = "unknown"
+    report = {
+        "version": version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "results": results,
+    }
+
+    for name, value in results.items():
+        print(f"{name:<55} {value:>14.1f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
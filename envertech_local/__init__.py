@@ -1,20 +1,83 @@
 # __init__.py
 from .protocol import InverterClient
-from .discovery import discover_devices_async
-from .commands import build_inverter_request, build_inverter_break_command, build_inverter_powercontrol_command, build_inverter_command
-from .utils import check_cs, parse_module_data
-from .api import get_inverter_data, stream_inverter_data
+from .framing import FrameReassembler
+from .readings import InverterReading, ModuleReading
+from .discovery import (
+    discover_devices_async,
+    discover_devices_iter,
+    probe_devices_async,
+    sweep_devices_async,
+    sweep_devices_iter,
+)
+from .discovery_cache import DiscoveryCache
+from .commands import (
+    build_inverter_request,
+    build_inverter_break_command,
+    build_inverter_powercontrol_command,
+    build_inverter_command,
+    clear_command_cache,
+)
+from .utils import check_cs, parse_module_data, decode_module_block, decode_frames
+from .api import PollResult, get_inverter_data, poll_inverter, stream_inverter_data
+from .fleet import poll_devices
+from .pool import SessionPool
+from .scheduler import StreamSchedule
+from .reconnect import ConnectionEvent, ReconnectPolicy
+from .delta import DeltaEncoder
+from .store import ReadingStore
+from .energy import EnergyAggregator
+from .recorder import FrameRecorder, FrameLog
+from .metrics import MetricsRegistry
+from .hub import StreamHub
+from .powercontrol import PowerDispatcher
+from .sharding import ShardedPoller
+from .server import ReadingServer
+from .sync import BlockingClient
+from .exporters import BatchExporter, CSVWriter, LineProtocolWriter, ParquetWriter
 
 __all__ = [
     "InverterClient",
+    "FrameReassembler",
+    "InverterReading",
+    "ModuleReading",
     "discover_devices_async",
+    "discover_devices_iter",
+    "probe_devices_async",
+    "sweep_devices_async",
+    "sweep_devices_iter",
+    "DiscoveryCache",
     "build_inverter_request",
     "build_inverter_break_command",
     "build_inverter_powercontrol_command",
     "build_inverter_command",
+    "clear_command_cache",
     "hex_string_to_bytes",
     "check_cs",
     "parse_module_data",
+    "decode_module_block",
+    "decode_frames",
     "get_inverter_data",
+    "poll_inverter",
+    "PollResult",
     "stream_inverter_data",
+    "poll_devices",
+    "SessionPool",
+    "StreamSchedule",
+    "ReconnectPolicy",
+    "ConnectionEvent",
+    "DeltaEncoder",
+    "ReadingStore",
+    "EnergyAggregator",
+    "FrameRecorder",
+    "FrameLog",
+    "MetricsRegistry",
+    "StreamHub",
+    "PowerDispatcher",
+    "ShardedPoller",
+    "ReadingServer",
+    "BlockingClient",
+    "BatchExporter",
+    "CSVWriter",
+    "LineProtocolWriter",
+    "ParquetWriter",
 ]
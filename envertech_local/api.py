@@ -1,13 +1,41 @@
 # api.py
 import asyncio
+import time
 from typing import AsyncGenerator
-from .protocol import InverterClient 
+from . import metrics
+from .protocol import InverterClient
 from .commands import build_inverter_break_command, build_inverter_request
+from .delta import DeltaEncoder
+from .pool import SessionPool
+from .reconnect import CIRCUIT_OPEN, CONNECTED, DISCONNECTED, PROBING, ConnectionEvent, ReconnectPolicy
+from .recorder import FrameRecorder
+from .scheduler import PacedPoller, StreamSchedule
 
-async def get_inverter_data(device: dict, port: int = 14889, timeout: int = 20) -> dict:
+NO_DATA_RETRY_DELAY = 0.5
+
+# Control codes that answer a 4215 data request
+ANSWER_CODES = (4177, 4102)
+
+# Budget kept free when waiting for answers to hedged requests
+DRAIN_MARGIN = 0.05
+
+async def get_inverter_data(
+    device: dict,
+    port: int = 14889,
+    timeout: int = 20,
+    pool: SessionPool = None,
+    structured: bool = False,
+    recorder: FrameRecorder = None
+) -> dict:
     """
     Given a device dictionary with 'ip' and 'serial_number',
     connects to the inverter and returns parsed data.
+
+    If a SessionPool is given, the connection is borrowed from it and
+    kept open afterwards instead of being closed with a break command.
+    With structured=True the data is an InverterReading instead of the
+    flat "{i}_{metric}" dict. Received frames are written to `recorder`
+    if given (pooled sessions use the pool's recorder).
     """
     ip = device.get("ip")
     sn = device.get("serial_number")
@@ -15,42 +43,395 @@ async def get_inverter_data(device: dict, port: int = 14889, timeout: int = 20)
     if not ip or not sn:
         raise ValueError("Device must have 'ip' and 'serial_number' keys")
 
-    client = InverterClient(ip, port, sn)
+    if pool is not None:
+        async with pool.session(ip, port, sn) as client:
+            return await _request_data(client, sn, timeout, structured)
+
+    client = InverterClient(ip, port, sn, recorder=recorder)
 
     try:
         await client.connect()
+        return await _request_data(client, sn, timeout, structured)
+
+    finally:
+        await client.send_command(build_inverter_break_command(sn))  # Send stop command
+        await client.disconnect()
+
+async def _request_data(client: InverterClient, sn: str, timeout: int, structured: bool):
+    start = time.perf_counter() if metrics.hooks else 0
+    await client.send_command(build_inverter_request(sn))  # Send start command
+
+    for attempt in range(1, 6):  # Max 5 retries (adjust if needed)
+        raw_data = await client.receive_data(timeout=timeout)
+        if raw_data is None and metrics.hooks:
+            metrics.emit("timeouts_total", sn)
+        if raw_data and metrics.hooks and attempt == 1:
+            metrics.emit("first_frame_seconds", sn, time.perf_counter() - start)
+        if raw_data and structured:
+            reading = client.parse_reading(raw_data)
+            if reading is not None:
+                _observe_poll(sn, start, attempt)
+                return reading, len(reading), reading.control_code
+            continue
+        if raw_data:
+            data, panel_count, control_code = client.parse_data(raw_data)
+            if data or panel_count is not None:
+                _observe_poll(sn, start, attempt)
+                return data, panel_count, control_code
+            else:
+                continue  # Retry if 4102 or unrecognized
+        await asyncio.sleep(0.5)  # Wait before retrying
         await client.send_command(build_inverter_request(sn))  # Send start command
+    _observe_poll(sn, start, 5)
+    return {}  # Give up after retries
 
-        for _ in range(5):  # Max 5 retries (adjust if needed)
-            raw_data = await client.receive_data(timeout=timeout)
-            if raw_data:
-                data, panel_count, control_code = client.parse_data(raw_data)
-                if data or panel_count is not None:
-                    return data, panel_count, control_code
-                else:
-                    continue  # Retry if 4102 or unrecognized
-            await asyncio.sleep(0.5)  # Wait before retrying
-            await client.send_command(build_inverter_request(sn))  # Send start command
-        return {}  # Give up after retries
+class PollResult:
+    """
+    Outcome of poll_inverter.
+
+    data is the flat dict (or an InverterReading with structured=True) and
+    None if the poll failed; error then says why. elapsed is the wall time
+    in seconds including connecting, attempts the number of requests sent.
+    """
+
+    __slots__ = ("serial_number", "data", "panel_count", "control_code", "elapsed", "attempts", "error")
+
+    def __init__(self, serial_number: str):
+        self.serial_number = serial_number
+        self.data = None
+        self.panel_count = None
+        self.control_code = None
+        self.elapsed = 0.0
+        self.attempts = 0
+        self.error = None
+
+    @property
+    def ok(self) -> bool:
+        return self.data is not None
 
+    def __repr__(self):
+        return (
+            f"PollResult(serial_number={self.serial_number!r}, ok={self.ok}, "
+            f"elapsed={self.elapsed:.3f}, attempts={self.attempts}, error={self.error!r})"
+        )
+
+async def poll_inverter(
+    device: dict,
+    port: int = 14889,
+    deadline: float = 10,
+    hedge_after: float = None,
+    pool: SessionPool = None,
+    structured: bool = False,
+    recorder: FrameRecorder = None
+) -> PollResult:
+    """
+    Like get_inverter_data, but bounded by one overall deadline.
+
+    Connecting, every retry and all waiting share `deadline` seconds, so a
+    poll never takes longer than that. If hedge_after is set and no data
+    arrived that many seconds after a request, the request is sent once
+    more on the same connection and whichever answer comes first is used.
+    The answer to the other request is then read and dropped (waiting at
+    most hedge_after longer); if it does not come, or the deadline cuts a
+    request short, a pooled connection is closed rather than handed on
+    with an answer still in flight.
+    A "no data" (4102) answer is retried after a short pause while the
+    budget lasts. Always returns a PollResult, also on failure.
+    """
+    ip = device.get("ip")
+    sn = device.get("serial_number")
+
+    if not ip or not sn:
+        raise ValueError("Device must have 'ip' and 'serial_number' keys")
+
+    result = PollResult(sn)
+    start = time.perf_counter()
+    end_time = asyncio.get_running_loop().time() + deadline
+    try:
+        await asyncio.wait_for(
+            _poll_within(ip, port, sn, hedge_after, pool, structured, recorder, result, end_time), deadline
+        )
+    except asyncio.TimeoutError:
+        if not result.ok:
+            result.error = f"No data within {deadline}s"
+            if metrics.hooks:
+                metrics.emit("timeouts_total", sn)
+    except Exception as e:
+        result.error = str(e) or type(e).__name__
+    result.elapsed = time.perf_counter() - start
+    if metrics.hooks:
+        metrics.emit("request_attempts", sn, result.attempts)
+        metrics.emit("poll_seconds", sn, result.elapsed)
+        if not result.ok:
+            metrics.emit("poll_failures_total", sn)
+    return result
+
+async def _poll_within(ip, port, sn, hedge_after, pool, structured, recorder, result: PollResult, end_time: float):
+    if pool is not None:
+        async with pool.session(ip, port, sn) as client:
+            unanswered = await _request_hedged(client, sn, hedge_after, structured, result, end_time)
+            if unanswered:
+                # A late answer could still arrive and be taken for the next
+                # borrower's; close so that the pool reconnects instead
+                await client.disconnect()
+        return
+
+    client = InverterClient(ip, port, sn, recorder=recorder)
+    try:
+        await client.connect()
+        await _request_hedged(client, sn, hedge_after, structured, result, end_time)
     finally:
-        await client.send_command(build_inverter_break_command(sn))  # Send stop command
+        if client.is_connected:
+            try:
+                await client.send_command(build_inverter_break_command(sn))
+            except OSError:
+                pass
         await client.disconnect()
 
+async def _request_hedged(
+    client: InverterClient,
+    sn: str,
+    hedge_after: float,
+    structured: bool,
+    result: PollResult,
+    end_time: float
+) -> int:
+    """
+    Request until data arrives, raising asyncio.TimeoutError at end_time.
+
+    Returns the number of requests still unanswered, after waiting up to
+    hedge_after (within the budget) for the answers to extra requests.
+    """
+    loop = asyncio.get_running_loop()
+    request = build_inverter_request(sn)
+    outstanding = 0
+    while True:
+        await client.send_command(request)
+        result.attempts += 1
+        outstanding += 1
+        hedge_at = loop.time() + hedge_after if hedge_after else None
+        while True:
+            wait = (end_time if hedge_at is None else min(hedge_at, end_time)) - loop.time()
+            frame = await client.receive_data(timeout=wait) if wait > 0 else None
+            if frame is None:
+                if loop.time() >= end_time:
+                    raise asyncio.TimeoutError()
+                if hedge_at is not None:
+                    # Slow answer, send the hedged request and keep waiting for either
+                    await client.send_command(request)
+                    result.attempts += 1
+                    outstanding += 1
+                    hedge_at = None
+                continue
+
+            result.control_code = int.from_bytes(frame[4:6], "big") if len(frame) >= 6 else None
+            if result.control_code in ANSWER_CODES:
+                outstanding -= 1
+            if structured:
+                reading = client.parse_reading(frame)
+                if reading is not None:
+                    result.data, result.panel_count = reading, len(reading)
+                    break
+            else:
+                data, panel_count, _ = client.parse_data(frame)
+                if panel_count is not None:
+                    result.data, result.panel_count = data, panel_count
+                    break
+            if result.control_code == 4102:
+                break  # No data yet, ask again
+        if result.data is not None:
+            break
+        if loop.time() + NO_DATA_RETRY_DELAY >= end_time:
+            raise asyncio.TimeoutError()
+        await asyncio.sleep(NO_DATA_RETRY_DELAY)
+
+    if outstanding > 0 and hedge_after:
+        outstanding = await _discard_answers(
+            client, outstanding, min(hedge_after, end_time - loop.time() - DRAIN_MARGIN)
+        )
+    return outstanding
+
+async def _discard_answers(client: InverterClient, outstanding: int, wait: float) -> int:
+    """Read and drop up to `outstanding` answers for `wait` seconds; return how many never came."""
+    loop = asyncio.get_running_loop()
+    end_time = loop.time() + wait
+    while outstanding > 0:
+        remaining = end_time - loop.time()
+        frame = await client.receive_data(timeout=remaining) if remaining > 0 else None
+        if frame is None:
+            break
+        if len(frame) >= 6 and int.from_bytes(frame[4:6], "big") in ANSWER_CODES:
+            outstanding -= 1
+    return outstanding
+
+def _observe_poll(sn: str, start: float, attempts: int):
+    if metrics.hooks:
+        metrics.emit("request_attempts", sn, attempts)
+        metrics.emit("poll_seconds", sn, time.perf_counter() - start)
+
 async def stream_inverter_data(
     device: dict,
     port: int = 14889,
     interval: float = 5,
-    timeout: int = 10
+    timeout: int = 10,
+    pool: SessionPool = None,
+    structured: bool = False,
+    schedule: StreamSchedule = None,
+    delta: DeltaEncoder = None,
+    recorder: FrameRecorder = None,
+    reconnect: ReconnectPolicy = None
 ) -> AsyncGenerator[dict, None]:
+    """
+    Poll an inverter every `interval` seconds and yield parsed data.
+
+    If a SessionPool is given, the stream runs on a pooled connection
+    which stays open after the stream ends. With structured=True each
+    update is an InverterReading instead of the flat dict. A
+    StreamSchedule limits outstanding requests, adapts the interval to
+    the device's response time and bounds the response queue. With a
+    DeltaEncoder only values that moved past their deadband are yielded,
+    plus a full keyframe at the start and every few updates. Received
+    frames are written to `recorder` if given.
+
+    Without a ReconnectPolicy the stream yields {"error": ...} and ends
+    when the connection fails. With one it never ends on its own: it
+    yields ConnectionEvent objects instead and reconnects with backoff,
+    see ReconnectPolicy.
+    """
     ip = device.get("ip")
     sn = device.get("serial_number")
 
     if not ip or not sn:
         raise ValueError("Device must have 'ip' and 'serial_number' keys")
+    if structured and delta is not None:
+        raise ValueError("structured and delta cannot be combined")
+
+    if reconnect is not None:
+        async for data in _resilient_stream(
+            ip, port, sn, interval, timeout, pool, structured, schedule, delta, recorder, reconnect
+        ):
+            yield data
+        return
+
+    # The inner generators are closed explicitly so that their tasks are
+    # stopped before the session is handed on, not whenever they are collected
+    if pool is not None:
+        async with pool.session(ip, port, sn) as client:
+            stream = _stream(client, sn, interval, timeout, structured, schedule, delta, close=False)
+            try:
+                async for data in stream:
+                    yield data
+            finally:
+                await stream.aclose()
+        return
 
-    client = InverterClient(ip, port, sn)
+    client = InverterClient(ip, port, sn, recorder=recorder)
+    await client.connect()
+    stream = _stream(client, sn, interval, timeout, structured, schedule, delta, close=True)
+    try:
+        async for data in stream:
+            yield data
+    finally:
+        await stream.aclose()
+
+async def _resilient_stream(
+    ip: str,
+    port: int,
+    sn: str,
+    interval: float,
+    timeout: int,
+    pool: SessionPool,
+    structured: bool,
+    schedule: StreamSchedule,
+    delta: DeltaEncoder,
+    recorder: FrameRecorder,
+    reconnect: ReconnectPolicy
+) -> AsyncGenerator[dict, None]:
+    breaker = reconnect.breaker(sn)
+    while True:
+        if breaker.is_open:
+            await asyncio.sleep(breaker.time_until_probe())
+            yield ConnectionEvent(sn, PROBING, failures=breaker.failures)
+
+        try:
+            if pool is not None:
+                async with pool.session(ip, port, sn) as client:
+                    stream = _connected_stream(client, sn, interval, timeout, structured, schedule, delta, breaker)
+                    try:
+                        async for data in stream:
+                            yield data
+                    finally:
+                        await stream.aclose()
+            else:
+                client = InverterClient(ip, port, sn, recorder=recorder)
+                try:
+                    await client.connect()
+                    stream = _connected_stream(client, sn, interval, timeout, structured, schedule, delta, breaker)
+                    try:
+                        async for data in stream:
+                            yield data
+                    finally:
+                        await stream.aclose()
+                finally:
+                    if client.is_connected:
+                        try:
+                            await client.send_command(build_inverter_break_command(sn))
+                        except OSError:
+                            pass
+                    await client.disconnect()
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        else:
+            error = "Stream ended"
+
+        if breaker.record_failure():
+            yield ConnectionEvent(sn, CIRCUIT_OPEN, error, breaker.failures, breaker.probe_interval)
+        elif breaker.is_open:
+            yield ConnectionEvent(sn, DISCONNECTED, error, breaker.failures, breaker.probe_interval)
+        else:
+            delay = reconnect.delay(breaker.failures)
+            yield ConnectionEvent(sn, DISCONNECTED, error, breaker.failures, delay)
+            await asyncio.sleep(delay)
+
+async def _connected_stream(
+    client: InverterClient,
+    sn: str,
+    interval: float,
+    timeout: int,
+    structured: bool,
+    schedule: StreamSchedule,
+    delta: DeltaEncoder,
+    breaker
+) -> AsyncGenerator[dict, None]:
+    """Run _stream on a connected client, raising ConnectionError instead of yielding an error."""
+    yield ConnectionEvent(sn, CONNECTED, failures=breaker.failures)
+    healthy = False
+    stream = _stream(client, sn, interval, timeout, structured, schedule, delta, close=False)
+    try:
+        async for data in stream:
+            if isinstance(data, dict) and "error" in data:
+                raise ConnectionError(data["error"])
+            if data and not healthy:
+                # Only a reading proves the device answers, a bare TCP accept does not
+                healthy = True
+                breaker.record_success()
+            yield data
+    finally:
+        await stream.aclose()
+
+async def _stream(
+    client: InverterClient,
+    sn: str,
+    interval: float,
+    timeout: int,
+    structured: bool,
+    schedule: StreamSchedule,
+    delta: DeltaEncoder,
+    close: bool
+) -> AsyncGenerator[dict, None]:
     response_queue = asyncio.Queue()
+    if delta is not None:
+        delta.reset()  # New connection, start with a keyframe
 
     async def sender():
         """Send requests periodically."""
@@ -73,9 +454,14 @@ async def stream_inverter_data(
         except Exception as e:
             await response_queue.put({"error": f"Receiver failed: {e}"})
 
-    await client.connect()
-    sender_task = asyncio.create_task(sender())
-    receiver_task = asyncio.create_task(receiver())
+    if schedule is not None:
+        poller = PacedPoller(client, sn, interval, timeout, schedule)
+        response_queue = poller.queue
+        sender_task = asyncio.create_task(poller.sender())
+        receiver_task = asyncio.create_task(poller.receiver())
+    else:
+        sender_task = asyncio.create_task(sender())
+        receiver_task = asyncio.create_task(receiver())
 
     try:
         while True:
@@ -86,13 +472,28 @@ async def stream_inverter_data(
                     break
 
                 # Parse inverter response
+                if structured:
+                    reading = client.parse_reading(result)
+                    if reading is not None:
+                        yield reading
+                    continue
+
                 data, panel_count, control_code = client.parse_data(result)
 
+                if delta is not None:
+                    if panel_count is not None:
+                        changes = delta.encode(data)
+                        if changes:
+                            yield changes
+                    continue
+
                 if data or panel_count is not None:
                     yield data
 
             except asyncio.TimeoutError:
                 # No response received in timeout window
+                if metrics.hooks:
+                    metrics.emit("timeouts_total", sn)
                 yield {}
 
     except Exception as e:
@@ -101,6 +502,8 @@ async def stream_inverter_data(
     finally:
         sender_task.cancel()
         receiver_task.cancel()
-        await client.send_command(build_inverter_break_command(sn))
-        await client.disconnect()
+        await asyncio.gather(sender_task, receiver_task, return_exceptions=True)
+        if close:
+            await client.send_command(build_inverter_break_command(sn))
+            await client.disconnect()
 
@@ -1,9 +1,16 @@
 #commands.py
 import logging
+from collections import OrderedDict
 from .utils import check_cs
 
 _LOGGER = logging.getLogger(__name__)
 
+# Number of distinct (serial, control code, payload) frames kept prebuilt
+COMMAND_CACHE_SIZE = 4096
+
+# Request, break and power control frames, least recently used first
+_FRAMES = OrderedDict()
+
 def build_inverter_command(
     current_id_hex: str,
     control_code_int: int,
@@ -52,30 +59,42 @@ def build_inverter_command(
     data.append(0x16)
     return bytes(data)
 
+def _cached(current_id_hex: str, control_code_int: int, payload: bytes, payload_padding: int) -> bytes:
+    """Return a fixed frame from the LRU cache, building it on first use."""
+    key = (current_id_hex, control_code_int, payload, payload_padding)
+    frame = _FRAMES.get(key)
+    if frame is not None:
+        _FRAMES.move_to_end(key)
+        return frame
+    frame = build_inverter_command(current_id_hex, control_code_int, payload, payload_padding)
+    if frame:  # Errors are not cached so that they are logged every time
+        _FRAMES[key] = frame
+        if len(_FRAMES) > COMMAND_CACHE_SIZE:
+            _FRAMES.popitem(last=False)
+    return frame
+
 def build_inverter_request(current_id_hex: str) -> bytes:
     # 4215 = 0x1077 = data request
-    return build_inverter_command(
-        current_id_hex=current_id_hex,
-        control_code_int=4215,
-        payload_padding=20
-    )
+    return _cached(current_id_hex, 4215, b"", 20)
 
 def build_inverter_break_command(current_id_hex: str) -> bytes:
     # 4161 = 0x1041 = break/disconnect
-    return build_inverter_command(
-        current_id_hex=current_id_hex,
-        control_code_int=4161,
-        payload_padding=10
-    )
+    return _cached(current_id_hex, 4161, b"", 10)
 
 def build_inverter_powercontrol_command(current_id_hex: str, level: int) -> bytes:
+    # 4407 = 0x1137 = power limit
     if not (0 <= level <= 255):
         _LOGGER.error(f"Level {level} out of valid byte range (0-255).")
         return b""
-    payload = bytes([level])
-    return build_inverter_command(
-        current_id_hex=current_id_hex,
-        control_code_int=4407,
-        payload=payload,
-        payload_padding=0
-    )
+    template = _cached(current_id_hex, 4407, b"\x00", 0)
+    if not template:
+        return b""
+    # Only the level byte and the checksum differ from the level 0 frame
+    frame = bytearray(template)
+    frame[-3] = level
+    frame[-2] = (template[-2] + level) & 0xFF
+    return bytes(frame)
+
+def clear_command_cache():
+    """Drop all prebuilt request, break and power control frames."""
+    _FRAMES.clear()
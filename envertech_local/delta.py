@@ -0,0 +1,90 @@
+#delta.py
+from typing import Optional
+
+KEYFRAME_KEY = "keyframe"
+
+
+def metric_name(key: str) -> str:
+    """Return the metric of a flat data key, e.g. "3_power" -> "power"."""
+    if key[:1].isdigit() and "_" in key:
+        return key.split("_", 1)[1]
+    return key
+
+
+class DeltaEncoder:
+    """
+    Turns consecutive flat data dicts into change-only updates.
+
+    A numeric value is emitted when it moved by more than its absolute
+    deadband or by more than its relative deadband (a fraction of the last
+    emitted value), whichever of the two is configured for its metric.
+    Without any deadband, and for other values, every change is emitted.
+    Values are compared with the last emitted value, so slow drift is
+    reported once it adds up. Every `keyframe_every` updates, and after
+    reset(), the full dict is emitted with "keyframe": True.
+
+    Args:
+        deadbands (dict): Absolute deadband per metric, e.g. {"power": 1.0}.
+        relative_deadbands (dict): Relative deadband per metric, e.g. {"energy": 0.001}.
+        keyframe_every (int | None): Updates between keyframes, None for only the first.
+
+    Example:
+        encoder = DeltaEncoder({"power": 2, "temperature": 0.5, "frequency": 0.05})
+    """
+
+    def __init__(
+        self,
+        deadbands: Optional[dict] = None,
+        relative_deadbands: Optional[dict] = None,
+        keyframe_every: Optional[int] = 60
+    ):
+        self.deadbands = deadbands or {}
+        self.relative_deadbands = relative_deadbands or {}
+        self.keyframe_every = keyframe_every
+        self._last = {}
+        self._count = 0
+
+    def reset(self):
+        """Forget the previous values so that the next update is a keyframe."""
+        self._last = {}
+        self._count = 0
+
+    def encode(self, data: dict) -> dict:
+        """
+        Return the changes in `data`, or {} if nothing moved past its deadband.
+        """
+        if not self._last or (self.keyframe_every and self._count >= self.keyframe_every):
+            self._last = dict(data)
+            self._count = 1
+            return {**data, KEYFRAME_KEY: True}
+
+        self._count += 1
+        changes = {}
+        last = self._last
+        for key, value in data.items():
+            if key not in last:
+                changes[key] = value
+                continue
+            previous = last[key]
+            if isinstance(value, (int, float)) and isinstance(previous, (int, float)):
+                diff = abs(value - previous)
+                metric = metric_name(key)
+                absolute = self.deadbands.get(metric)
+                relative = self.relative_deadbands.get(metric)
+                if absolute is None and relative is None:
+                    if diff == 0:
+                        continue
+                # Suppressed only while inside every deadband configured for the metric
+                elif (absolute is None or diff <= absolute) and (
+                    relative is None or diff <= relative * abs(previous)
+                ):
+                    continue
+            elif value == previous:
+                continue
+            changes[key] = value
+
+        if not changes:
+            return {}
+        last.update(changes)
+        changes[KEYFRAME_KEY] = False
+        return changes
@@ -1,8 +1,10 @@
 #discovery.py
 import asyncio
+import ipaddress
 import socket
 import netifaces
 import logging
+from . import metrics
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -14,7 +16,16 @@ DEST_PORTS = {
     "wifi": 48899,
 }
 
-RECV_BUFFER = 1024
+# Source port of a reply tells which probe it answers
+SOURCE_PORTS = {port: msg_type for msg_type, port in DEST_PORTS.items()}
+
+RCVBUF_SIZE = 1 << 20
+
+# Sweep pacing: probes are sent in bursts of at most rate * SWEEP_TICK packets
+SWEEP_TICK = 0.01
+
+_SENT = object()
+_TIMEOUT = object()
 
 
 def get_interface_ips():
@@ -58,84 +69,289 @@ def decode_wifi_response(data):
     return None
 
 
+class _DiscoveryProtocol(asyncio.DatagramProtocol):
+    """
+    Receives discovery replies on one interface socket.
+
+    Both probe types are sent from the same socket; replies are told apart
+    by the port they come from. Every device seen for the first time is put
+    on the shared queue straight from the datagram callback.
+    """
+
+    def __init__(self, interface_ip, queue, seen_serials):
+        self.interface_ip = interface_ip
+        self.queue = queue
+        self.seen_serials = seen_serials
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        sock = transport.get_extra_info("socket")
+        if sock is not None:
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RCVBUF_SIZE)
+            except OSError as e:
+                _LOGGER.debug(f"Could not enlarge receive buffer on {self.interface_ip}: {e}")
+
+    def datagram_received(self, data, addr):
+        _LOGGER.debug(f"[{self.interface_ip}] Received from {addr}: {data}")
+        msg_type = SOURCE_PORTS.get(addr[1])
+        if msg_type is None:
+            # Unknown source port, guess from the payload
+            msg_type = "wifi" if data.count(b",") >= 2 else "localcon"
+
+        try:
+            if msg_type == "localcon":
+                device = decode_localcon_response(data)
+            else:
+                device = decode_wifi_response(data)
+        except Exception as e:
+            _LOGGER.warning(f"[{msg_type}] Failed to decode response from {addr}: {e}")
+            if metrics.hooks:
+                metrics.emit("discovery_errors_total", self.interface_ip)
+            return
+
+        if metrics.hooks:
+            metrics.emit("discovery_replies_total", self.interface_ip)
+
+        if not device:
+            return
+        serial = device["serial_number"]
+        if serial and serial not in self.seen_serials:
+            self.seen_serials.add(serial)
+            self.queue.put_nowait(device)
+
+    def error_received(self, exc):
+        _LOGGER.debug(f"[{self.interface_ip}] Socket error: {exc}")
+
+
+async def _open_interface(loop, interface_ip, queue, seen_serials, probes):
+    """Bind one socket on interface_ip and broadcast the given (msg, port) probes from it."""
+    try:
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _DiscoveryProtocol(interface_ip, queue, seen_serials),
+            local_addr=(interface_ip, 0),
+            allow_broadcast=True
+        )
+    except OSError as e:
+        _LOGGER.warning(f"Could not bind discovery socket on {interface_ip}: {e}")
+        return None
+
+    local_port = transport.get_extra_info("sockname")[1]
+    _LOGGER.debug(f"Bound to {interface_ip}:{local_port}")
+    for msg, dest_port in probes:
+        transport.sendto(msg, ("255.255.255.255", dest_port))
+        _LOGGER.info(f"Sent from {interface_ip}:{local_port} to 255.255.255.255:{dest_port}")
+    return transport
+
+
+async def _collect(queue, timeout, expected_count=None, serials=None, sending=False):
+    """
+    Yield devices from the queue for `timeout` seconds. With sending=True
+    the timeout only starts once a sender puts _SENT on the queue.
+
+    One timer puts _TIMEOUT on the queue when the time is up, so waiting
+    for each device is a plain queue.get().
+    """
+    loop = asyncio.get_running_loop()
+    timer = None if sending else loop.call_later(timeout, queue.put_nowait, _TIMEOUT)
+    pending = {serial.upper() for serial in serials} if serials else None
+    found = 0
+
+    try:
+        while True:
+            device = await queue.get()
+            if device is _TIMEOUT:
+                return
+            if device is _SENT:
+                timer = loop.call_later(timeout, queue.put_nowait, _TIMEOUT)
+                continue
+            yield device
+
+            found += 1
+            if pending is not None:
+                pending.discard(device["serial_number"].upper())
+                if not pending:
+                    return
+            if expected_count and found >= expected_count:
+                return
+    finally:
+        if timer is not None:
+            timer.cancel()
+
+
 async def send_and_receive(loop, interface_ip, msg_type, msg, dest_port, timeout):
-    discovered = []
+    """Send a single probe type from one interface and return the devices that answered."""
+    queue = asyncio.Queue()
+    transport = await _open_interface(loop, interface_ip, queue, set(), [(msg, dest_port)])
+    if transport is None:
+        return []
+    try:
+        return [device async for device in _collect(queue, timeout)]
+    finally:
+        transport.close()
+
+
+async def discover_devices_iter(timeout=3, expected_count=None, serials=None):
+    """
+    Broadcast both discovery probes on every interface and yield each
+    device as soon as its first reply is decoded.
+
+    Args:
+        timeout (float): Seconds to wait for replies.
+        expected_count (int | None): Stop once this many devices were found.
+        serials (iterable | None): Stop once all of these serials were found.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
     seen_serials = set()
+    probes = [
+        (UDP_DISCOVERY_MSG, DEST_PORTS["localcon"]),
+        (UDP_DISCOVERY_MSG_WIFI, DEST_PORTS["wifi"]),
+    ]
 
-    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    sock.setblocking(False)
-    sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+    transports = []
+    for interface_ip in get_interface_ips():
+        transport = await _open_interface(loop, interface_ip, queue, seen_serials, probes)
+        if transport is not None:
+            transports.append(transport)
 
     try:
-        sock.bind((interface_ip, 0))  # Let OS pick the port
-        local_port = sock.getsockname()[1]
-        _LOGGER.debug(f"[{msg_type}] Bound to {interface_ip}:{local_port}")
+        if transports:
+            async for device in _collect(queue, timeout, expected_count, serials):
+                yield device
+    finally:
+        for transport in transports:
+            transport.close()
 
-        # Send broadcast message
-        sock.sendto(msg, ("255.255.255.255", dest_port))
-        _LOGGER.info(f"[{msg_type}] Sent from {interface_ip}:{local_port} to 255.255.255.255:{dest_port}")
 
-        end_time = loop.time() + timeout
+async def discover_devices_async(timeout=3, expected_count=None, serials=None):
+    return [
+        device async for device in discover_devices_iter(timeout, expected_count, serials)
+    ]
 
-        while loop.time() < end_time:
-            try:
-                future = loop.sock_recvfrom(sock, RECV_BUFFER)
-                data, addr = await asyncio.wait_for(future, timeout=end_time - loop.time())
-                _LOGGER.debug(f"[{msg_type}] Received from {addr}: {data}")
-
-                if msg_type == "localcon":
-                    try:
-                        device = decode_localcon_response(data)
-                    except Exception as e:
-                        _LOGGER.warning(f"[{msg_type}] Failed to decode binary response: {e}")
-                        continue
-                elif msg_type == "wifi":
-                    try:
-                        device = decode_wifi_response(data)
-                        if not device:
-                            continue
-                    except Exception as e:
-                        _LOGGER.warning(f"[{msg_type}] Failed to decode text response: {e}")
-                        continue
-                else:
-                    continue
-
-                serial = device["serial_number"]
-                if serial and serial not in seen_serials:
-                    seen_serials.add(serial)
-                    discovered.append(device)
-
-            except asyncio.TimeoutError:
-                break
+
+async def probe_devices_iter(ips, timeout=1, expected_count=None, serials=None):
+    """
+    Send both discovery probes by unicast to each known IP and yield
+    devices as they answer. Works across routed subnets where broadcasts
+    do not reach.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: _DiscoveryProtocol("0.0.0.0", queue, set()),
+        local_addr=("0.0.0.0", 0)
+    )
+    try:
+        for ip in ips:
+            transport.sendto(UDP_DISCOVERY_MSG, (ip, DEST_PORTS["localcon"]))
+            transport.sendto(UDP_DISCOVERY_MSG_WIFI, (ip, DEST_PORTS["wifi"]))
+        async for device in _collect(queue, timeout, expected_count, serials):
+            yield device
     finally:
-        sock.close()
+        transport.close()
+
 
-    return discovered
+async def probe_devices_async(ips, timeout=1, expected_count=None, serials=None):
+    return [
+        device async for device in probe_devices_iter(ips, timeout, expected_count, serials)
+    ]
 
 
-async def discover_devices_async(timeout=3):
-    interface_ips = get_interface_ips()
+class _SweepProtocol(_DiscoveryProtocol):
+    """Discovery socket of a sweep; only accepts replies from swept addresses."""
 
+    def __init__(self, networks, queue, seen_serials):
+        super().__init__("0.0.0.0", queue, seen_serials)
+        self.networks = networks
+
+    def datagram_received(self, data, addr):
+        try:
+            source = ipaddress.ip_address(addr[0])
+        except ValueError:
+            return
+        if any(source in network for network in self.networks):
+            super().datagram_received(data, addr)
+
+
+async def _send_sweep(transports, networks, rate, queue):
+    """Send both probes to every host of the networks, at most `rate` packets per second."""
     loop = asyncio.get_running_loop()
-    tasks = []
+    probes = [
+        (UDP_DISCOVERY_MSG, DEST_PORTS["localcon"]),
+        (UDP_DISCOVERY_MSG_WIFI, DEST_PORTS["wifi"]),
+    ]
+    start = loop.time()
+    sent = 0
+    hosts = 0
+    try:
+        for network in networks:
+            for host in network.hosts():
+                transport = transports[hosts % len(transports)]
+                hosts += 1
+                host = str(host)
+                for msg, dest_port in probes:
+                    transport.sendto(msg, (host, dest_port))
+                sent += len(probes)
+                ahead = sent / rate - (loop.time() - start)
+                if ahead > SWEEP_TICK:
+                    await asyncio.sleep(ahead)
+        _LOGGER.info(f"Sweep sent {sent} probes in {loop.time() - start:.1f}s")
+        if metrics.hooks:
+            metrics.emit("discovery_probes_total", "sweep", sent)
+    finally:
+        queue.put_nowait(_SENT)
 
-    for interface_ip in interface_ips:
-        tasks.append(
-            send_and_receive(loop, interface_ip, "localcon", UDP_DISCOVERY_MSG, DEST_PORTS["localcon"], timeout)
-        )
-        tasks.append(
-            send_and_receive(loop, interface_ip, "wifi", UDP_DISCOVERY_MSG_WIFI, DEST_PORTS["wifi"], timeout)
-        )
 
-    results = await asyncio.gather(*tasks)
+async def sweep_devices_iter(networks, rate=20000, sockets=4, timeout=2, expected_count=None, serials=None):
+    """
+    Send both discovery probes by unicast to every host of one or more
+    CIDR ranges and yield devices as they answer. Finds gateways on routed
+    subnets that broadcasts do not reach, without keeping IP lists.
 
-    # Flatten and deduplicate
-    discovered = []
+    Probes are spread over a few shared sockets and paced to `rate`
+    packets per second, so a /16 (131k probes) takes about 7 seconds at
+    the default rate. Replies are matched while probes are still going out.
+
+    Args:
+        networks (str | iterable): CIDR ranges, e.g. "10.20.0.0/16".
+        rate (int): Probe packets per second.
+        sockets (int): Number of sending sockets.
+        timeout (float): Seconds to wait for replies after the last probe.
+        expected_count (int | None): Stop once this many devices were found.
+        serials (iterable | None): Stop once all of these serials were found.
+    """
+    if isinstance(networks, str):
+        networks = [networks]
+    networks = list(ipaddress.collapse_addresses(ipaddress.ip_network(n, strict=False) for n in networks))
+    if rate <= 0:
+        raise ValueError("rate must be positive")
+
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
     seen_serials = set()
-    for device_list in results:
-        for device in device_list:
-            if device["serial_number"] not in seen_serials:
-                discovered.append(device)
-                seen_serials.add(device["serial_number"])
+    transports = []
+    sender = None
+    try:
+        for _ in range(max(1, sockets)):
+            transport, _ = await loop.create_datagram_endpoint(
+                lambda: _SweepProtocol(networks, queue, seen_serials),
+                local_addr=("0.0.0.0", 0)
+            )
+            transports.append(transport)
+        sender = asyncio.create_task(_send_sweep(transports, networks, rate, queue))
+        async for device in _collect(queue, timeout, expected_count, serials, sending=True):
+            yield device
+    finally:
+        if sender is not None:
+            sender.cancel()
+            await asyncio.gather(sender, return_exceptions=True)
+        for transport in transports:
+            transport.close()
+
 
-    return discovered
+async def sweep_devices_async(networks, rate=20000, sockets=4, timeout=2, expected_count=None, serials=None):
+    return [
+        device async for device in sweep_devices_iter(networks, rate, sockets, timeout, expected_count, serials)
+    ]
@@ -0,0 +1,140 @@
+#discovery_cache.py
+import json
+import logging
+import os
+import time
+from typing import Iterable, Optional
+from .discovery import discover_devices_async, probe_devices_async
+
+_LOGGER = logging.getLogger(__name__)
+
+DEVICE_FIELDS = ("ip", "mac", "source")
+
+
+class DiscoveryCache:
+    """
+    File-backed cache of discovered devices: serial -> ip/mac/source/last_seen.
+
+    Cached devices are available immediately after load(). refresh()
+    confirms entries older than ttl with unicast probes to their known IP
+    and only falls back to a broadcast when something is missing. A stale
+    device that neither the probes nor the broadcast found in max_failures
+    refreshes in a row is dropped, so a decommissioned inverter does not
+    force a broadcast forever.
+    """
+
+    def __init__(self, path: str, ttl: float = 3600, max_failures: int = 3):
+        self.path = path
+        self.ttl = ttl
+        self.max_failures = max_failures
+        self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, serial):
+        return serial.upper() in self._entries
+
+    def load(self) -> "DiscoveryCache":
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            entries = {}
+        except (OSError, ValueError) as e:
+            _LOGGER.warning(f"Ignoring unreadable discovery cache {self.path}: {e}")
+            entries = {}
+        self._entries = {serial.upper(): entry for serial, entry in entries.items()}
+        return self
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def update(self, devices: Iterable[dict], now: Optional[float] = None):
+        now = time.time() if now is None else now
+        for device in devices:
+            serial = device["serial_number"].upper()
+            entry = self._entries.setdefault(serial, {})
+            for field in DEVICE_FIELDS:
+                if device.get(field) is not None or field not in entry:
+                    entry[field] = device.get(field)
+            entry["last_seen"] = now
+            entry["failures"] = 0
+
+    def devices(self, fresh_only: bool = False) -> list:
+        """Cached devices in the format returned by discover_devices_async."""
+        now = time.time()
+        return [
+            self._to_device(serial, entry)
+            for serial, entry in self._entries.items()
+            if not fresh_only or now - entry["last_seen"] < self.ttl
+        ]
+
+    def stale_serials(self) -> set:
+        now = time.time()
+        return {serial for serial, entry in self._entries.items() if now - entry["last_seen"] >= self.ttl}
+
+    async def refresh(
+        self,
+        serials: Optional[Iterable[str]] = None,
+        timeout: float = 3,
+        probe_timeout: float = 1
+    ) -> list:
+        """
+        Bring the cache up to date and return all cached devices.
+
+        Args:
+            serials: Serials the caller needs; any not in the cache force a broadcast.
+            timeout (float): Broadcast discovery timeout.
+            probe_timeout (float): Timeout for the unicast revalidation probes.
+        """
+        start = time.time()
+        stale = self.stale_serials()
+        revalidate = set(stale)
+        if stale:
+            ips = {self._entries[serial]["ip"] for serial in stale}
+            _LOGGER.debug(f"Revalidating {len(stale)} stale devices on {len(ips)} IPs")
+            confirmed = await probe_devices_async(ips, timeout=probe_timeout, serials=stale)
+            self.update(confirmed)
+            stale = self.stale_serials()
+
+        wanted = {serial.upper() for serial in serials} if serials else set()
+        missing = wanted - set(self._entries)
+        if not self._entries or stale or missing:
+            _LOGGER.info(
+                f"Broadcast discovery needed ({len(stale)} stale, {len(missing)} unknown, {len(self)} cached)"
+            )
+            found = await discover_devices_async(
+                timeout=timeout,
+                serials=(stale | missing) if (stale or missing) and self._entries else None
+            )
+            self.update(found)
+
+        # Stale entries that no reply confirmed during this refresh
+        self._expire({
+            serial for serial in revalidate
+            if serial in self._entries and self._entries[serial]["last_seen"] < start
+        })
+        self.save()
+        return self.devices()
+
+    def _expire(self, unconfirmed: set):
+        """Count a failed refresh for each serial and drop those that failed too often."""
+        for serial in unconfirmed:
+            entry = self._entries[serial]
+            entry["failures"] = entry.get("failures", 0) + 1
+            if entry["failures"] >= self.max_failures:
+                _LOGGER.info(f"Dropping {serial} from discovery cache after {entry['failures']} failed refreshes")
+                del self._entries[serial]
+
+    @staticmethod
+    def _to_device(serial: str, entry: dict) -> dict:
+        return {
+            "ip": entry.get("ip"),
+            "serial_number": serial,
+            "mac": entry.get("mac"),
+            "source": entry.get("source"),
+        }
@@ -0,0 +1,232 @@
+#energy.py
+import datetime
+import statistics
+import time
+from typing import AsyncIterator, Optional
+from .readings import InverterReading, iter_modules
+from .utils import MODULE_METRICS
+
+# The energy counter is an unsigned 32-bit field, so it wraps at this value
+ENERGY_WRAP = (1 << 32) * dict((name, scale) for name, scale, _ in MODULE_METRICS)["energy"]
+
+# A decrease is a rollover only if the counter was this close to ENERGY_WRAP
+ROLLOVER_MARGIN = 0.1
+
+
+class ModuleEnergy:
+    """Running energy state of one module."""
+
+    __slots__ = (
+        "serial", "mi_sn", "energy", "power", "timestamp", "day", "daily_yield",
+        "yield_total", "last_delta", "resets", "rollovers", "performance", "reset_candidate"
+    )
+
+    def __init__(self, serial: str, mi_sn: str):
+        self.serial = serial
+        self.mi_sn = mi_sn
+        self.energy = None
+        self.power = 0.0
+        self.timestamp = None
+        self.day = None
+        self.daily_yield = 0.0
+        self.yield_total = 0.0
+        self.last_delta = 0.0
+        self.resets = 0
+        self.rollovers = 0
+        self.performance = None
+        self.reset_candidate = None
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return (
+            f"ModuleEnergy(serial={self.serial!r}, mi_sn={self.mi_sn!r}, "
+            f"daily_yield={self.daily_yield}, performance={self.performance})"
+        )
+
+
+class _DeviceTotals:
+    __slots__ = ("power", "day", "daily_yield", "yield_total")
+
+    def __init__(self):
+        self.power = 0.0
+        self.day = None
+        self.daily_yield = 0.0
+        self.yield_total = 0.0
+
+
+class EnergyAggregator:
+    """
+    Keeps energy accounting up to date from a stream of readings.
+
+    Every sample updates each module in constant time: the energy delta
+    since the previous sample, the daily yield (reset at local midnight),
+    the yield since the aggregator started and the running device and
+    fleet totals. Past samples are never re-read.
+
+    The energy counter can go backwards in two ways. Near ENERGY_WRAP it
+    wrapped around, and the delta is taken across the wrap. Otherwise the
+    module either restarted its counter, e.g. after a firmware reboot, or
+    briefly reported a bogus value such as 0 while offline. The baseline
+    is then kept until a later sample decides: back at or above it was a
+    glitch, still below it but counting up again is a restart, and the
+    restarted counter's value counts as produced since the reset. No case
+    produces a negative delta.
+
+    Underperformance compares each module's power with the median power
+    of the modules of the same inverter in the same sample. The ratio is
+    smoothed per module as `performance`, and only samples where the
+    median reaches min_power (i.e. during production) are used.
+
+    Args:
+        smoothing (float): Weight of the newest ratio in `performance`, 0 to 1.
+        min_power (float): Median power below which no ratio is taken.
+        threshold (float): `performance` below which a module is reported
+            by underperforming().
+    """
+
+    def __init__(self, smoothing: float = 0.1, min_power: float = 20.0, threshold: float = 0.8):
+        if not 0 < smoothing <= 1:
+            raise ValueError("smoothing must be in (0, 1]")
+        self.smoothing = smoothing
+        self.min_power = min_power
+        self.threshold = threshold
+        self._modules = {}
+        self._devices = {}
+        self.fleet_power = 0.0
+        self.fleet_day = None
+        self.fleet_daily_yield = 0.0
+        self.fleet_yield_total = 0.0
+
+    def add(self, serial: str, reading, timestamp: Optional[float] = None):
+        """
+        Account one InverterReading or flat data dict of device `serial`.
+
+        Anything else a stream may yield, such as {} on timeout, error dicts
+        or ConnectionEvents, is ignored.
+        """
+        if not isinstance(reading, (InverterReading, dict)) or not reading:
+            return
+        if isinstance(reading, dict) and "error" in reading:
+            return
+        timestamp = time.time() if timestamp is None else timestamp
+        day = datetime.date.fromtimestamp(timestamp)
+
+        device = self._devices.get(serial)
+        if device is None:
+            device = self._devices[serial] = _DeviceTotals()
+        if device.day != day:
+            device.day = day
+            device.daily_yield = 0.0
+        if self.fleet_day is None or day > self.fleet_day:
+            self.fleet_day = day
+            self.fleet_daily_yield = 0.0
+
+        sample = []
+        for mi_sn, values in iter_modules(reading):
+            key = (serial, mi_sn)
+            module = self._modules.get(key)
+            if module is None:
+                module = self._modules[key] = ModuleEnergy(serial, mi_sn)
+            power_change = values["power"] - module.power
+            delta = self._update(module, values["energy"], values["power"], timestamp, day)
+
+            device.power += power_change
+            device.daily_yield += delta
+            device.yield_total += delta
+            self.fleet_power += power_change
+            if day == self.fleet_day:
+                self.fleet_daily_yield += delta
+            self.fleet_yield_total += delta
+            sample.append(module)
+
+        self._rate(sample)
+
+    def _update(self, module: ModuleEnergy, energy: float, power: float, timestamp: float, day) -> float:
+        if module.day != day:
+            module.day = day
+            module.daily_yield = 0.0
+
+        previous = module.energy
+        candidate, module.reset_candidate = module.reset_candidate, None
+        if previous is None:
+            delta = 0.0  # First sample is the baseline
+        elif energy >= previous:
+            delta = energy - previous
+        elif previous >= ENERGY_WRAP * (1 - ROLLOVER_MARGIN) and energy <= ENERGY_WRAP * ROLLOVER_MARGIN:
+            delta = energy + ENERGY_WRAP - previous
+            module.rollovers += 1
+        elif candidate is not None and energy > candidate:
+            delta = energy  # Counting up below the baseline, the counter restarted from zero
+            module.resets += 1
+        else:
+            # Possibly a glitch; keep the baseline until a later sample tells
+            module.reset_candidate = energy
+            energy = previous
+            delta = 0.0
+
+        module.energy = energy
+        module.power = power
+        module.timestamp = timestamp
+        module.last_delta = delta
+        module.daily_yield += delta
+        module.yield_total += delta
+        return delta
+
+    def _rate(self, sample: list):
+        if len(sample) < 2:
+            return
+        median = statistics.median(module.power for module in sample)
+        if median < self.min_power:
+            return
+        for module in sample:
+            ratio = module.power / median
+            if module.performance is None:
+                module.performance = ratio
+            else:
+                module.performance += self.smoothing * (ratio - module.performance)
+
+    async def consume(self, serial: str, stream: AsyncIterator):
+        """Account every reading of a stream_inverter_data stream."""
+        async for reading in stream:
+            self.add(serial, reading)
+
+    def module(self, serial: str, mi_sn: str) -> Optional[ModuleEnergy]:
+        return self._modules.get((serial, mi_sn))
+
+    @property
+    def modules(self) -> list:
+        return list(self._modules.values())
+
+    def device_totals(self, serial: str) -> Optional[dict]:
+        """Current power, daily yield and yield since start of one device."""
+        device = self._devices.get(serial)
+        if device is None:
+            return None
+        return {
+            "power": device.power,
+            "day": device.day,
+            "daily_yield": device.daily_yield,
+            "yield_total": device.yield_total,
+        }
+
+    def totals(self) -> dict:
+        """Fleet-wide totals; constant time."""
+        return {
+            "devices": len(self._devices),
+            "modules": len(self._modules),
+            "power": self.fleet_power,
+            "day": self.fleet_day,
+            "daily_yield": self.fleet_daily_yield,
+            "yield_total": self.fleet_yield_total,
+        }
+
+    def underperforming(self, threshold: Optional[float] = None) -> list:
+        """Modules whose smoothed performance is below threshold, worst first."""
+        threshold = self.threshold if threshold is None else threshold
+        modules = [
+            module for module in self._modules.values()
+            if module.performance is not None and module.performance < threshold
+        ]
+        return sorted(modules, key=lambda module: module.performance)
@@ -0,0 +1,202 @@
+#exporters.py
+import csv
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+from typing import AsyncIterator, Optional
+from .readings import METRIC_NAMES, InverterReading, iter_modules
+
+_LOGGER = logging.getLogger(__name__)
+
+COLUMNS = ("timestamp", "serial", "mi_sn") + METRIC_NAMES
+
+_STOP = object()
+
+
+class CSVWriter:
+    """Appends rows to a CSV file, writing the header when the file is new."""
+
+    def __init__(self, path: str):
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "a", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        if new_file:
+            self._writer.writerow(COLUMNS)
+
+    def write_batch(self, rows: list):
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class LineProtocolWriter:
+    """
+    Writes InfluxDB line protocol to a file or a local TCP socket.
+
+    Args:
+        path (str | None): File to append to.
+        address (tuple | None): (host, port) of a line protocol listener,
+            e.g. a Telegraf socket_listener.
+        measurement (str): Measurement name.
+    """
+
+    def __init__(self, path: Optional[str] = None, address: Optional[tuple] = None, measurement: str = "envertech"):
+        if (path is None) == (address is None):
+            raise ValueError("Exactly one of path or address must be given")
+        self.measurement = measurement
+        self._file = open(path, "a", encoding="utf-8") if path is not None else None
+        self._socket = socket.create_connection(address) if address is not None else None
+
+    def encode(self, rows: list) -> str:
+        lines = []
+        for timestamp, serial, mi_sn, *values in rows:
+            fields = ",".join(f"{name}={value}" for name, value in zip(METRIC_NAMES, values))
+            lines.append(f"{self.measurement},serial={serial},mi_sn={mi_sn} {fields} {int(timestamp * 1e9)}\n")
+        return "".join(lines)
+
+    def write_batch(self, rows: list):
+        payload = self.encode(rows)
+        if self._file is not None:
+            self._file.write(payload)
+            self._file.flush()
+        else:
+            self._socket.sendall(payload.encode())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        if self._socket is not None:
+            self._socket.close()
+
+
+class ParquetWriter:
+    """Writes each batch as a row group of a Parquet file. Requires pyarrow."""
+
+    def __init__(self, path: str):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError("ParquetWriter requires pyarrow: pip install envertech_local[parquet]") from e
+        self._pa = pyarrow
+        self._schema = pyarrow.schema(
+            [("timestamp", pyarrow.float64()), ("serial", pyarrow.string()), ("mi_sn", pyarrow.string())]
+            + [(name, pyarrow.float64()) for name in METRIC_NAMES]
+        )
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema)
+
+    def write_batch(self, rows: list):
+        columns = list(zip(*rows))
+        self._writer.write_table(self._pa.Table.from_arrays(
+            [self._pa.array(column) for column in columns], schema=self._schema
+        ))
+
+    def close(self):
+        self._writer.close()
+
+
+class BatchExporter:
+    """
+    Buffers readings from any number of streams and writes them in batches.
+
+    submit() only puts the reading on a thread-safe queue; a background
+    thread turns readings into one row per module and hands a batch to the
+    writer once it holds max_rows rows or max_delay seconds have passed, so
+    encoding and disk or socket I/O never run on the event loop.
+
+    Args:
+        writer: CSVWriter, LineProtocolWriter, ParquetWriter or any object
+            with write_batch(rows) and close().
+        max_rows (int): Rows per batch.
+        max_delay (float): Seconds before a partial batch is flushed.
+        max_pending (int): Readings buffered before submit() drops new ones.
+    """
+
+    def __init__(self, writer, max_rows: int = 5000, max_delay: float = 5.0, max_pending: int = 100000):
+        self.writer = writer
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.dropped = 0
+        self.written = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name="envertech-exporter", daemon=True)
+        self._thread.start()
+
+    def submit(self, serial: str, reading, timestamp: Optional[float] = None):
+        """
+        Queue an InverterReading or flat data dict; never blocks.
+
+        Anything else a stream may yield, such as {} on timeout, error dicts
+        or ConnectionEvents, is ignored.
+        """
+        if not isinstance(reading, (InverterReading, dict)) or not reading:
+            return
+        if isinstance(reading, dict) and "error" in reading:
+            return
+        try:
+            self._queue.put_nowait((time.time() if timestamp is None else timestamp, serial, reading))
+        except queue.Full:
+            self.dropped += 1
+
+    async def consume(self, serial: str, stream: AsyncIterator):
+        """Submit every reading of a stream_inverter_data stream."""
+        async for reading in stream:
+            self.submit(serial, reading)
+
+    def close(self):
+        """Flush everything still buffered and close the writer."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _run(self):
+        rows = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is not None and item is not _STOP:
+                timestamp, serial, reading = item
+                try:
+                    rows += [
+                        (timestamp, serial, mi_sn, *(values[name] for name in METRIC_NAMES))
+                        for mi_sn, values in iter_modules(reading)
+                    ]
+                except Exception as e:
+                    # A malformed reading must not stop the exporter
+                    _LOGGER.error(f"Exporter skipped a reading of {serial}: {e!r}")
+                if deadline is None and rows:
+                    deadline = time.monotonic() + self.max_delay
+
+            if rows and (
+                item is None or item is _STOP or len(rows) >= self.max_rows
+                or time.monotonic() >= deadline  # A busy queue must not postpone the flush
+            ):
+                self._flush(rows)
+                rows = []
+                deadline = None
+            if item is _STOP:
+                return
+
+    def _flush(self, rows: list):
+        try:
+            self.writer.write_batch(rows)
+            self.written += len(rows)
+        except Exception as e:
+            _LOGGER.error(f"Exporter failed to write {len(rows)} rows: {e}")
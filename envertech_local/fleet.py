@@ -0,0 +1,70 @@
+#fleet.py
+import asyncio
+import logging
+from typing import AsyncGenerator, Optional
+from .api import get_inverter_data
+from .pool import SessionPool
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def poll_devices(
+    devices: list,
+    port: int = 14889,
+    timeout: int = 20,
+    concurrency: int = 32,
+    deadline: Optional[float] = 30,
+    pool: Optional[SessionPool] = None,
+    structured: bool = False
+) -> AsyncGenerator[tuple, None]:
+    """
+    Poll many inverters concurrently and yield results as they complete.
+
+    Args:
+        devices (list): Device dicts as returned by discover_devices_async.
+        port (int): TCP port of the inverter gateways.
+        timeout (int): Per-receive timeout passed to get_inverter_data.
+        concurrency (int): Maximum number of devices polled at the same time.
+        deadline (float | None): Hard limit in seconds for a single device,
+            or None to only rely on get_inverter_data's own retries.
+        pool (SessionPool | None): Optional pool to keep connections open
+            between sweeps.
+        structured (bool): Return InverterReading objects instead of dicts.
+
+    Yields:
+        tuple: (device, result) where result is what get_inverter_data
+        returned, or {"error": ...} if the device failed or hit its deadline.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def poll_one(device):
+        async with semaphore:
+            try:
+                if deadline is None:
+                    result = await get_inverter_data(
+                        device, port=port, timeout=timeout, pool=pool, structured=structured
+                    )
+                else:
+                    result = await asyncio.wait_for(
+                        get_inverter_data(device, port=port, timeout=timeout, pool=pool, structured=structured),
+                        timeout=deadline
+                    )
+            except asyncio.TimeoutError:
+                _LOGGER.warning(f"Device {device.get('ip')} exceeded deadline of {deadline}s")
+                result = {"error": f"Deadline of {deadline}s exceeded"}
+            except Exception as e:
+                _LOGGER.warning(f"Polling device {device.get('ip')} failed: {e}")
+                result = {"error": str(e)}
+            return device, result
+
+    tasks = [asyncio.create_task(poll_one(device)) for device in devices]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
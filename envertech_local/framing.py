@@ -0,0 +1,105 @@
+#framing.py
+import logging
+from .utils import check_cs
+
+_LOGGER = logging.getLogger(__name__)
+
+FRAME_START = 0x68
+FRAME_END = 0x16
+HEADER_LENGTH = 4  # 0x68, length high, length low, 0x68
+MIN_FRAME_LENGTH = HEADER_LENGTH + 2 + 2  # + control code + checksum/end
+
+# Largest 4177 response accepted: 22 bytes of framing plus 32 per module
+MAX_MODULES = 128
+MAX_FRAME_LENGTH = 22 + 32 * MAX_MODULES
+
+
+class FrameReassembler:
+    """
+    Cuts complete protocol frames out of a TCP byte stream.
+
+    Frames look like 0x68 <len hi> <len lo> 0x68 ... <checksum> 0x16, where
+    the length field covers the whole frame. Incoming chunks are collected in
+    a persistent buffer, so frames split across reads or several frames in a
+    single read are handled. Returned frames are memoryview slices of one
+    immutable snapshot of the received chunk and are never copied.
+
+    A header announcing more than max_frame_length bytes is taken for
+    garbage and skipped, so that a false start byte cannot hold back the
+    valid frames behind it.
+    """
+
+    def __init__(self, verify_checksum: bool = True, max_frame_length: int = MAX_FRAME_LENGTH):
+        self.verify_checksum = verify_checksum
+        self.max_frame_length = max_frame_length
+        self._buffer = bytearray()
+        self.discarded_bytes = 0
+
+    def __len__(self):
+        """Number of buffered bytes that do not form a complete frame yet."""
+        return len(self._buffer)
+
+    def reset(self):
+        self._buffer.clear()
+
+    def feed(self, chunk: bytes) -> list:
+        """
+        Add received bytes and return every frame completed by them.
+
+        Returns:
+            list[memoryview]: Complete, validated frames in arrival order.
+        """
+        if not chunk:
+            return []
+        if self._buffer:
+            self._buffer += chunk
+            data = bytes(self._buffer)
+        else:
+            data = bytes(chunk)
+
+        view = memoryview(data)
+        frames = []
+        pos = 0
+        end = len(data)
+
+        while pos < end:
+            start = data.find(FRAME_START, pos)
+            if start < 0:
+                self._discard(end - pos)
+                pos = end
+                break
+            if start > pos:
+                self._discard(start - pos)
+                pos = start
+            if end - pos < HEADER_LENGTH:
+                break
+            if data[pos + 3] != FRAME_START:
+                self._discard(1)
+                pos += 1
+                continue
+
+            length = (data[pos + 1] << 8) | data[pos + 2]
+            if length < MIN_FRAME_LENGTH or length > self.max_frame_length:
+                self._discard(1)
+                pos += 1
+                continue
+            if end - pos < length:
+                break  # Wait for the rest of the frame
+
+            frame = view[pos:pos + length]
+            if frame[-1] != FRAME_END or (
+                self.verify_checksum and check_cs(frame[:-2]) != frame[-2]
+            ):
+                _LOGGER.debug(f"Dropping malformed frame of {length} bytes, resyncing")
+                self._discard(1)
+                pos += 1
+                continue
+
+            frames.append(frame)
+            pos += length
+
+        self._buffer = bytearray(view[pos:])
+        return frames
+
+    def _discard(self, count: int):
+        self.discarded_bytes += count
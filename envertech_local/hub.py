@@ -0,0 +1,211 @@
+#hub.py
+import asyncio
+import logging
+import time
+from typing import Optional
+from .api import stream_inverter_data
+from .pool import SessionPool
+from .scheduler import BoundedQueue, StreamSchedule
+
+_LOGGER = logging.getLogger(__name__)
+
+_END = object()
+
+
+class Subscription:
+    """
+    Async iterator over the readings of one device, fed by a StreamHub.
+
+    Updates are InverterReading objects shared by all subscribers, or an
+    {"error": ...} dict right before the feed ends.
+    """
+
+    def __init__(self, hub: "StreamHub", serial: str, queue_size: int, overflow: str):
+        self.hub = hub
+        self.serial = serial
+        self.queue = BoundedQueue(queue_size, overflow)
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.closed:
+            raise StopAsyncIteration
+        item = await self.queue.get()
+        if item is _END:
+            self.closed = True
+            raise StopAsyncIteration
+        return item
+
+    @property
+    def dropped(self) -> int:
+        return self.queue.dropped
+
+    async def aclose(self):
+        if not self.closed:
+            self.closed = True
+            await self.hub._unsubscribe(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+
+class _Feed:
+    """One connection and poll schedule for one device."""
+
+    def __init__(self, hub: "StreamHub", device: dict):
+        self.hub = hub
+        self.device = device
+        self.subscribers = set()
+        self.latest = None
+        self.latest_time = None
+        self.task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        hub = self.hub
+        error = None
+        stream = stream_inverter_data(
+            self.device,
+            port=hub.port,
+            interval=hub.interval,
+            timeout=hub.timeout,
+            pool=hub.pool,
+            structured=True,
+            schedule=hub.schedule
+        )
+        try:
+            async for reading in stream:
+                if isinstance(reading, dict):
+                    if "error" in reading:
+                        error = reading
+                        break
+                    continue  # {} on timeout
+                self.latest = reading
+                self.latest_time = time.time()
+                for subscription in self.subscribers:
+                    subscription.queue.put_nowait(reading)
+        except Exception as e:
+            error = {"error": str(e)}
+        finally:
+            await stream.aclose()
+            for subscription in self.subscribers:
+                if error is not None:
+                    subscription.queue.put_nowait(error)
+                subscription.queue.put_nowait(_END)
+            if hub._feeds.get(self.device["serial_number"]) is self:
+                del hub._feeds[self.device["serial_number"]]
+
+
+class StreamHub:
+    """
+    Shares one inverter stream between any number of consumers.
+
+    The first subscriber for a device starts a single stream_inverter_data
+    poll; every frame is parsed once and the resulting InverterReading is
+    put on each subscriber's own bounded queue. New subscribers get the
+    latest cached reading immediately. The poll stops when the last
+    subscriber leaves.
+
+    Args:
+        port (int): TCP port of the gateways.
+        interval (float): Poll interval passed to stream_inverter_data.
+        timeout (int): Receive timeout passed to stream_inverter_data.
+        queue_size (int): Per-subscriber queue length.
+        overflow (str): "drop_oldest" or "latest", see BoundedQueue.
+        schedule (StreamSchedule | None): Optional request pacing.
+        pool (SessionPool | None): Optional pool for the hub's connections.
+    """
+
+    def __init__(
+        self,
+        port: int = 14889,
+        interval: float = 5,
+        timeout: int = 10,
+        queue_size: int = 16,
+        overflow: str = "drop_oldest",
+        schedule: Optional[StreamSchedule] = None,
+        pool: Optional[SessionPool] = None
+    ):
+        self.port = port
+        self.interval = interval
+        self.timeout = timeout
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.schedule = schedule
+        self.pool = pool
+        self._feeds = {}
+
+    def subscribe(self, device: dict) -> Subscription:
+        """Subscribe to a device dict with 'ip' and 'serial_number'."""
+        serial = device.get("serial_number")
+        if not device.get("ip") or not serial:
+            raise ValueError("Device must have 'ip' and 'serial_number' keys")
+
+        feed = self._feeds.get(serial)
+        if feed is None:
+            _LOGGER.debug(f"Starting shared feed for {serial}")
+            feed = _Feed(self, device)
+            self._feeds[serial] = feed
+
+        subscription = Subscription(self, serial, self.queue_size, self.overflow)
+        if feed.latest is not None:
+            subscription.queue.put_nowait(feed.latest)
+        feed.subscribers.add(subscription)
+        return subscription
+
+    def latest(self, serial: str):
+        """Most recent InverterReading of a subscribed device, or None."""
+        feed = self._feeds.get(serial)
+        return feed.latest if feed is not None else None
+
+    async def get(self, device: dict, max_age: Optional[float] = None, timeout: float = 30):
+        """
+        Return a reading for the device without opening another connection.
+
+        A cached reading younger than max_age seconds is returned right
+        away; otherwise this waits for the next update of the shared feed.
+        Returns None if the feed ended without a reading.
+        """
+        async with self.subscribe(device) as subscription:
+            feed = self._feeds.get(device["serial_number"])
+            if feed is not None and feed.latest is not None and max_age is not None:
+                if time.time() - feed.latest_time <= max_age:
+                    return feed.latest
+            try:
+                if feed is not None and feed.latest is not None:
+                    await subscription.__anext__()  # Skip the cached reading
+                return await asyncio.wait_for(subscription.__anext__(), timeout=timeout)
+            except StopAsyncIteration:
+                return None
+
+    @property
+    def devices(self) -> list:
+        return list(self._feeds)
+
+    async def _unsubscribe(self, subscription: Subscription):
+        feed = self._feeds.get(subscription.serial)
+        if feed is None:
+            return
+        feed.subscribers.discard(subscription)
+        if not feed.subscribers:
+            await self._stop_feed(feed)
+
+    async def _stop_feed(self, feed: _Feed):
+        _LOGGER.debug(f"Stopping shared feed for {feed.device['serial_number']}")
+        self._feeds.pop(feed.device["serial_number"], None)
+        feed.task.cancel()
+        await asyncio.gather(feed.task, return_exceptions=True)
+
+    async def close(self):
+        for feed in list(self._feeds.values()):
+            await self._stop_feed(feed)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
@@ -0,0 +1,127 @@
+#metrics.py
+import bisect
+import logging
+from typing import Callable, Optional
+
+_LOGGER = logging.getLogger(__name__)
+
+# Hooks are called as hook(name, device, value). Instrumented code checks
+# `if metrics.hooks:` before measuring anything, so with no hooks
+# registered the cost is a single list truth test.
+#
+# Names ending in "_total" are counters (value is the increment), all
+# other names are observations for a histogram:
+#   connect_seconds, connect_errors_total, bytes_received_total,
+#   frames_received_total, timeouts_total, first_frame_seconds,
+#   request_attempts, no_data_responses_total, poll_seconds, parse_seconds,
+#   poll_failures_total, discovery_replies_total, discovery_errors_total,
+#   discovery_probes_total
+# timeouts_total counts timeouts a caller sees (a poll or stream update
+# without an answer), not the idle read timeouts of stream receivers.
+hooks = []
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 20, 60)
+METRIC_BUCKETS = {
+    "request_attempts": (1, 2, 3, 4, 5),
+    "parse_seconds": (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01),
+}
+
+
+def add_hook(hook: Callable[[str, str, float], None]):
+    if hook not in hooks:
+        hooks.append(hook)
+
+
+def remove_hook(hook: Callable[[str, str, float], None]):
+    if hook in hooks:
+        hooks.remove(hook)
+
+
+def emit(name: str, device: str, value: float = 1):
+    """Pass an event to every registered hook."""
+    for hook in hooks:
+        try:
+            hook(name, device, value)
+        except Exception:
+            _LOGGER.exception(f"Metrics hook {hook!r} failed for {name}")
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    In-process counters and histograms per device, usable as a hook.
+
+    Example:
+        registry = MetricsRegistry().enable()
+        ...
+        print(registry.to_prometheus())
+    """
+
+    def __init__(self, buckets: Optional[dict] = None):
+        self.buckets = {**METRIC_BUCKETS, **(buckets or {})}
+        self.counters = {}
+        self.histograms = {}
+
+    def __call__(self, name: str, device: str, value: float = 1):
+        key = (name, device)
+        if name.endswith("_total"):
+            self.counters[key] = self.counters.get(key, 0) + value
+            return
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = _Histogram(self.buckets.get(name, DEFAULT_BUCKETS))
+            self.histograms[key] = histogram
+        histogram.observe(value)
+
+    def enable(self) -> "MetricsRegistry":
+        add_hook(self)
+        return self
+
+    def disable(self):
+        remove_hook(self)
+
+    def reset(self):
+        self.counters.clear()
+        self.histograms.clear()
+
+    def counter(self, name: str, device: str) -> float:
+        return self.counters.get((name, device), 0)
+
+    def to_prometheus(self, prefix: str = "envertech_") -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        for name in sorted({name for name, _ in self.counters}):
+            lines.append(f"# TYPE {prefix}{name} counter")
+            for (metric, device), value in sorted(self.counters.items()):
+                if metric == name:
+                    lines.append(f'{prefix}{name}{{device="{device}"}} {value}')
+
+        for name in sorted({name for name, _ in self.histograms}):
+            lines.append(f"# TYPE {prefix}{name} histogram")
+            for (metric, device), histogram in sorted(self.histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{prefix}{name}_bucket{{device="{device}",le="{bound}"}} {cumulative}')
+                lines.append(f'{prefix}{name}_bucket{{device="{device}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{prefix}{name}_sum{{device="{device}"}} {histogram.sum}')
+                lines.append(f'{prefix}{name}_count{{device="{device}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
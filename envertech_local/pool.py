@@ -0,0 +1,127 @@
+#pool.py
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from .protocol import InverterClient
+from .commands import build_inverter_break_command
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _Session:
+    __slots__ = ("client", "lock", "last_used")
+
+    def __init__(self, client: InverterClient):
+        self.client = client
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+
+class SessionPool:
+    """
+    Keeps InverterClient connections open between polls.
+
+    Sessions are keyed by (ip, port, serial). Each session is used by one
+    caller at a time; a broken connection is reopened on the next use and
+    sessions unused for longer than idle_timeout are closed. Frames received
+    on pooled sessions are written to `recorder` if one is given.
+    """
+
+    def __init__(self, idle_timeout: float = 300, recorder=None):
+        self.idle_timeout = idle_timeout
+        self.recorder = recorder
+        self._sessions = {}
+        self._closed = False
+
+    def __len__(self):
+        return len(self._sessions)
+
+    @asynccontextmanager
+    async def session(self, ip: str, port: int, sn: str) -> AsyncIterator[InverterClient]:
+        """
+        Borrow a connected client for (ip, port, sn).
+
+        Data left on the connection by the previous borrower is discarded.
+        If the caller raises or is cancelled, e.g. by a deadline with a
+        request still in flight, the connection is dropped so that the next
+        borrower starts from a fresh connection; closing a stream early
+        keeps it.
+        """
+        if self._closed:
+            raise RuntimeError("Session pool is closed")
+
+        await self.evict_idle()
+
+        key = (ip, port, sn)
+        entry = self._sessions.get(key)
+        if entry is None:
+            entry = _Session(InverterClient(ip, port, sn, recorder=self.recorder))
+            self._sessions[key] = entry
+
+        async with entry.lock:
+            client = entry.client
+            if not client.is_connected:
+                if client.writer is not None:
+                    _LOGGER.info(f"Session to {ip}:{port} is no longer healthy, reconnecting")
+                    await self._close_client(client, send_break=False)
+                await client.connect()
+            else:
+                dropped = await client.discard_pending()
+                if dropped:
+                    _LOGGER.debug(f"Discarded {dropped} stale bytes on session to {ip}:{port}")
+            try:
+                yield client
+            except GeneratorExit:
+                # A stream closed early (aclose(), break); the connection is fine
+                raise
+            except BaseException:
+                await self._close_client(client, send_break=False)
+                raise
+            finally:
+                entry.last_used = time.monotonic()
+                if self._closed:
+                    # The pool was closed while this session was in use
+                    await self._close_client(client)
+
+    async def evict_idle(self):
+        """Close sessions that have not been used within idle_timeout."""
+        now = time.monotonic()
+        for key, entry in list(self._sessions.items()):
+            if entry.lock.locked() or now - entry.last_used < self.idle_timeout:
+                continue
+            del self._sessions[key]
+            _LOGGER.debug(f"Evicting idle session {key}")
+            await self._close_client(entry.client)
+
+    async def close(self):
+        """
+        Send the break command to every open session and disconnect.
+
+        Sessions in use, e.g. by a running stream, are disconnected right
+        away instead of waiting for their borrower, whose next read fails.
+        """
+        self._closed = True
+        sessions, self._sessions = self._sessions, {}
+        for entry in sessions.values():
+            if entry.lock.locked():
+                await self._close_client(entry.client, send_break=False)
+                continue
+            async with entry.lock:
+                await self._close_client(entry.client)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    @staticmethod
+    async def _close_client(client: InverterClient, send_break: bool = True):
+        try:
+            if send_break and client.is_connected:
+                await client.send_command(build_inverter_break_command(client.sn))
+            await client.disconnect()
+        except (OSError, asyncio.TimeoutError) as e:
+            _LOGGER.debug(f"Error while closing session to {client.ip}:{client.port}: {e}")
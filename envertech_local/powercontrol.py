@@ -0,0 +1,175 @@
+#powercontrol.py
+import asyncio
+import logging
+import time
+from typing import AsyncGenerator, Optional, Union
+from .commands import build_inverter_powercontrol_command
+from .pool import SessionPool
+
+_LOGGER = logging.getLogger(__name__)
+
+POWERCONTROL_CODE = 4407
+RECONNECT_DELAY = 0.5
+
+
+class PowerDispatcher:
+    """
+    Sends power-limit levels (4407) to many inverters and tracks acknowledgements.
+
+    A level counts as applied once the gateway answers with a 4407 frame.
+    Each device is retried until `deadline`, waiting up to `timeout` for the
+    answer to each attempt. Levels already acknowledged are not sent again
+    unless force=True.
+
+    Args:
+        pool (SessionPool | None): Pool to send over; a private one is used
+            if omitted. Sessions are exclusive, so a pool that also runs
+            long streams will delay dispatches to those devices.
+        port (int): TCP port of the gateways.
+        concurrency (int): Devices handled at the same time.
+        timeout (float): Seconds to wait for the acknowledgement of one attempt.
+        deadline (float): Seconds per device across all attempts.
+    """
+
+    def __init__(
+        self,
+        pool: Optional[SessionPool] = None,
+        port: int = 14889,
+        concurrency: int = 64,
+        timeout: float = 2.0,
+        deadline: float = 5.0
+    ):
+        self._own_pool = pool is None
+        self.pool = pool if pool is not None else SessionPool()
+        self.port = port
+        self.timeout = timeout
+        self.deadline = deadline
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._applied = {}
+
+    def applied_level(self, serial: str) -> Optional[int]:
+        """Last level acknowledged by the device, or None."""
+        return self._applied.get(serial)
+
+    async def set_level(self, device: dict, level: int, force: bool = False) -> dict:
+        """
+        Send one level to one device.
+
+        Returns:
+            dict: serial_number, level, applied, skipped, attempts,
+            latency (seconds until acknowledged or given up) and error.
+        """
+        ip = device.get("ip")
+        sn = device.get("serial_number")
+        if not ip or not sn:
+            raise ValueError("Device must have 'ip' and 'serial_number' keys")
+
+        result = {
+            "serial_number": sn,
+            "level": level,
+            "applied": False,
+            "skipped": False,
+            "attempts": 0,
+            "latency": 0.0,
+            "error": None,
+        }
+        if not force and self._applied.get(sn) == level:
+            result["applied"] = True
+            result["skipped"] = True
+            return result
+
+        command = build_inverter_powercontrol_command(sn, level)
+        if not command:
+            result["error"] = f"Cannot build power control command for level {level}"
+            return result
+
+        async with self._semaphore:
+            start = time.perf_counter()
+            try:
+                await asyncio.wait_for(self._send(ip, sn, command, result), timeout=self.deadline)
+                result["error"] = None
+            except asyncio.TimeoutError:
+                last_error = f" (last error: {result['error']})" if result["error"] else ""
+                result["error"] = f"Not acknowledged within {self.deadline}s{last_error}"
+            except Exception as e:
+                result["error"] = str(e)
+            result["latency"] = time.perf_counter() - start
+
+        if result["applied"]:
+            self._applied[sn] = level
+        else:
+            # The device state is unknown now, so the next dispatch must send again
+            self._applied.pop(sn, None)
+            _LOGGER.warning(f"Power level {level} not applied on {sn}: {result['error']}")
+        return result
+
+    async def _send(self, ip: str, sn: str, command: bytes, result: dict):
+        while True:
+            try:
+                await self._send_once(ip, sn, command, result)
+                return
+            except OSError as e:
+                # Connection failed or dropped; the pool reconnects on the next try
+                result["error"] = str(e)
+                await asyncio.sleep(RECONNECT_DELAY)
+
+    async def _send_once(self, ip: str, sn: str, command: bytes, result: dict):
+        loop = asyncio.get_running_loop()
+        async with self.pool.session(ip, self.port, sn) as client:
+            while True:
+                result["attempts"] += 1
+                await client.send_command(command)
+                attempt_end = loop.time() + self.timeout
+                while True:
+                    remaining = attempt_end - loop.time()
+                    frame = await client.receive_data(timeout=remaining) if remaining > 0 else None
+                    if frame is None:
+                        break  # Retry
+                    if len(frame) >= 6 and int.from_bytes(frame[4:6], "big") == POWERCONTROL_CODE:
+                        result["applied"] = True
+                        return
+                    # Anything else, e.g. a late data response, is not ours
+
+    async def dispatch_iter(
+        self,
+        devices: list,
+        level: Union[int, dict],
+        force: bool = False
+    ) -> AsyncGenerator[dict, None]:
+        """
+        Send levels to many devices concurrently and yield results as they finish.
+
+        Args:
+            devices (list): Device dicts with 'ip' and 'serial_number'.
+            level (int | dict): One level for all devices, or serial -> level.
+        """
+        tasks = []
+        for device in devices:
+            device_level = level.get(device["serial_number"]) if isinstance(level, dict) else level
+            if device_level is None:
+                continue
+            tasks.append(asyncio.create_task(self.set_level(device, device_level, force)))
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def dispatch(self, devices: list, level: Union[int, dict], force: bool = False) -> dict:
+        """Like dispatch_iter, but wait for all devices and return serial -> result."""
+        return {
+            result["serial_number"]: result
+            async for result in self.dispatch_iter(devices, level, force)
+        }
+
+    async def close(self):
+        if self._own_pool:
+            await self.pool.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
@@ -1,28 +1,83 @@
 #protocol.py
 import asyncio
 import logging
-from .utils import parse_module_data
+import time
+from collections import deque
+from typing import Optional
+from . import metrics
+from .framing import FrameReassembler
+from .readings import InverterReading
 
 _LOGGER = logging.getLogger(__name__)
 
+READ_SIZE = 4096
+
+# How long discard_pending waits for bytes that may already be buffered
+DISCARD_WAIT = 0.001
+
 class InverterClient:
-    def __init__(self, ip: str, port: int, sn: str):
+    def __init__(self, ip: str, port: int, sn: str, recorder=None):
         self.ip = ip
         self.port = port
         self.sn = sn
+        self.recorder = recorder
         self.reader = None
         self.writer = None
+        self.framer = FrameReassembler()
+        self._frames = deque()
 
     async def connect(self):
-        self.reader, self.writer = await asyncio.open_connection(self.ip, self.port)
+        start = time.perf_counter() if metrics.hooks else 0
+        try:
+            self.reader, self.writer = await asyncio.open_connection(self.ip, self.port)
+        except OSError:
+            if metrics.hooks:
+                metrics.emit("connect_errors_total", self.sn)
+            raise
+        if metrics.hooks:
+            metrics.emit("connect_seconds", self.sn, time.perf_counter() - start)
+        self.framer.reset()
+        self._frames.clear()
         _LOGGER.info(f"Connected to inverter at {self.ip}:{self.port}")
 
     async def disconnect(self):
-        if self.writer:
-            self.writer.close()
-            await self.writer.wait_closed()
+        writer, self.reader, self.writer = self.writer, None, None
+        if writer:
+            writer.close()
+            await writer.wait_closed()
             _LOGGER.info("Disconnected from inverter")
 
+    async def discard_pending(self) -> int:
+        """
+        Drop everything received but not consumed yet and return the byte count.
+
+        Called when a connection changes hands, so that a late answer to an
+        earlier request is not taken for the answer to the next one.
+        StreamReader has no public non-blocking read, so each read gets
+        DISCARD_WAIT seconds: buffered bytes are returned within that, an
+        idle connection costs one such wait.
+        """
+        dropped = len(self.framer) + sum(len(frame) for frame in self._frames)
+        self._frames.clear()
+        self.framer.reset()
+        reader = self.reader
+        while reader is not None and not reader.at_eof():
+            try:
+                chunk = await asyncio.wait_for(reader.read(READ_SIZE), timeout=DISCARD_WAIT)
+            except asyncio.TimeoutError:
+                break
+            dropped += len(chunk)
+        return dropped
+
+    @property
+    def is_connected(self) -> bool:
+        """True while the TCP connection is open and the peer has not closed it."""
+        return (
+            self.writer is not None
+            and not self.writer.is_closing()
+            and not self.reader.at_eof()
+        )
+
     async def send_command(self, data: bytes):
         if self.writer is None:
             await self.connect()
@@ -32,52 +87,77 @@ class InverterClient:
         self.writer.write(data)
         await self.writer.drain()
 
-    async def receive_data(self, timeout=5):
-        try:
-            raw = await asyncio.wait_for(self.reader.read(1024), timeout=timeout)
-            return list(raw)
-        except asyncio.TimeoutError:
+    async def receive_data(self, timeout=5) -> Optional[memoryview]:
+        """
+        Return the next complete frame, or None if none arrived in time.
+
+        Frames are read through the FrameReassembler, so a frame split over
+        several TCP reads is joined and coalesced frames are returned one
+        at a time.
+        """
+        if self._frames:
+            return self._frames.popleft()
+
+        loop = asyncio.get_running_loop()
+        end_time = loop.time() + timeout
+        while True:
+            remaining = end_time - loop.time()
+            if remaining <= 0:
+                return None
+            try:
+                chunk = await asyncio.wait_for(self.reader.read(READ_SIZE), timeout=remaining)
+            except asyncio.TimeoutError:
+                return None  # Callers decide whether this counts as a timeout
+            if not chunk:
+                raise ConnectionError(f"Connection closed by inverter at {self.ip}:{self.port}")
+            frames = self.framer.feed(chunk)
+            if metrics.hooks:
+                metrics.emit("bytes_received_total", self.sn, len(chunk))
+                if frames:
+                    metrics.emit("frames_received_total", self.sn, len(frames))
+            if self.recorder is not None:
+                for frame in frames:
+                    self.recorder.write(frame, self.sn)
+            self._frames.extend(frames)
+            if self._frames:
+                return self._frames.popleft()
+
+    def parse_reading(self, raw: bytes | memoryview | list[int]) -> InverterReading | None:
+        """Parse a 4177 frame into an InverterReading, or return None for any other frame."""
+        if not raw:
             return None
+        if not metrics.hooks:
+            return InverterReading.from_frame(raw)
+
+        start = time.perf_counter()
+        reading = InverterReading.from_frame(raw)
+        metrics.emit("parse_seconds", self.sn, time.perf_counter() - start)
+        if reading is None and len(raw) >= 6 and int.from_bytes(raw[4:6], "big") == 4102:
+            metrics.emit("no_data_responses_total", self.sn)
+        return reading
 
-    def parse_data(self, raw: list[int]) -> tuple[dict, int | None]:
+    def parse_data(self, raw: bytes | memoryview | list[int]) -> tuple[dict, int | None, int | None]:
         if not raw or len(raw) < 22:
-            return {}, None
+            return {}, None, None
 
         control_code = int.from_bytes(raw[4:6], "big")
         data = {}
         number_of_panels = None
 
         if control_code == 4177:
-            number_of_panels = (len(raw) - 22) // 32
-            for i in range(number_of_panels):
-                base = 20 + i * 32
-                offset = {
-                    "mi_sn": base,
-                    "input_voltage": base + 6,
-                    "power": base + 8,
-                    "energy": base + 10,
-                    "temperature": base + 14,
-                    "grid_voltage": base + 16,
-                    "frequency": base + 18,
-                }
-                parsed = parse_module_data(raw, offset)
-                if parsed:
-                    for k, v in parsed.items():
-                        key = f"{i}_{k}"
-                        data[key] = round(v, 2) if isinstance(v, (int, float)) else v
-
-            # Sum totals
-            for key in ["power", "energy"]:
-                total = sum(data.get(f"{i}_{key}", 0) for i in range(number_of_panels))
-                data[f"total_{key}"] = round(total, 2)
-
-            # Firmware version
-            data["firmware_version"] = f"{raw[10]}/{raw[12]}"
+            start = time.perf_counter() if metrics.hooks else 0
+            reading = InverterReading.from_frame(raw)
+            data = reading.as_dict()
+            number_of_panels = len(reading)
+            if metrics.hooks:
+                metrics.emit("parse_seconds", self.sn, time.perf_counter() - start)
 
         elif control_code == 4102:
             # Command recognized but no meaningful data to return
             data = {}
             number_of_panels = None
+            if metrics.hooks:
+                metrics.emit("no_data_responses_total", self.sn)
 
         else:
             # Unknown control code — could log or ignore
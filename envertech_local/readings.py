@@ -0,0 +1,127 @@
+#readings.py
+from typing import Iterator, Optional
+from .utils import MODULE_METRICS, decode_module_block
+
+METRIC_NAMES = tuple(name for name, _, _ in MODULE_METRICS)
+
+
+class ModuleReading:
+    """Values of a single microinverter module within an InverterReading."""
+
+    __slots__ = ("index", "mi_sn") + METRIC_NAMES
+
+    def __init__(self, index, mi_sn, input_voltage, power, energy, temperature, grid_voltage, frequency):
+        self.index = index
+        self.mi_sn = mi_sn
+        self.input_voltage = input_voltage
+        self.power = power
+        self.energy = energy
+        self.temperature = temperature
+        self.grid_voltage = grid_voltage
+        self.frequency = frequency
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in ("mi_sn",) + METRIC_NAMES}
+
+    def __repr__(self):
+        return f"ModuleReading(index={self.index}, mi_sn={self.mi_sn!r}, power={self.power})"
+
+
+class InverterReading:
+    """
+    Parsed 4177 response stored as one array per metric.
+
+    Modules are materialised as ModuleReading objects only when accessed.
+    Values keep full precision; as_dict() returns the rounded legacy
+    "{i}_{metric}" dict that parse_data has always produced.
+    """
+
+    __slots__ = ("columns", "firmware_version", "control_code")
+
+    def __init__(self, columns: dict, firmware_version: str, control_code: int = 4177):
+        self.columns = columns
+        self.firmware_version = firmware_version
+        self.control_code = control_code
+
+    @classmethod
+    def from_frame(cls, raw) -> Optional["InverterReading"]:
+        """Build a reading from a 4177 frame, or return None for other frames."""
+        if len(raw) < 22 or int.from_bytes(raw[4:6], "big") != 4177:
+            return None
+        if isinstance(raw, list):
+            raw = bytes(raw)
+        count = (len(raw) - 22) // 32
+        columns = decode_module_block(raw[20:20 + count * 32])
+        return cls(columns, f"{raw[10]}/{raw[12]}")
+
+    def __len__(self):
+        return len(self.columns["mi_sn"])
+
+    def __getitem__(self, index: int) -> ModuleReading:
+        if index < 0:
+            index += len(self)
+        columns = self.columns
+        return ModuleReading(
+            index,
+            columns["mi_sn"][index],
+            *(columns[name][index] for name in METRIC_NAMES)
+        )
+
+    def __iter__(self) -> Iterator[ModuleReading]:
+        for index in range(len(self)):
+            yield self[index]
+
+    @property
+    def modules(self) -> list:
+        return list(self)
+
+    @property
+    def total_power(self) -> float:
+        return sum(self.columns["power"])
+
+    @property
+    def total_energy(self) -> float:
+        return sum(self.columns["energy"])
+
+    def as_dict(self) -> dict:
+        """Return the legacy flat dict, e.g. {"0_power": 60.0, ..., "total_power": 120.0}."""
+        data = {}
+        columns = self.columns
+        for i, mi_sn in enumerate(columns["mi_sn"]):
+            data[f"{i}_mi_sn"] = mi_sn
+            for name in METRIC_NAMES:
+                data[f"{i}_{name}"] = round(columns[name][i], 2)
+
+        # Totals are summed from the rounded per-module values
+        count = len(self)
+        for key in ["power", "energy"]:
+            total = sum(data[f"{i}_{key}"] for i in range(count))
+            data[f"total_{key}"] = round(total, 2)
+
+        data["firmware_version"] = self.firmware_version
+        return data
+
+    def __repr__(self):
+        return (
+            f"InverterReading(modules={len(self)}, total_power={self.total_power}, "
+            f"firmware_version={self.firmware_version!r})"
+        )
+
+
+def iter_modules(reading):
+    """Yield (mi_sn, {metric: value}) for an InverterReading or a flat dict."""
+    if isinstance(reading, InverterReading):
+        columns = reading.columns
+        for i, mi_sn in enumerate(columns["mi_sn"]):
+            yield mi_sn, {name: columns[name][i] for name in METRIC_NAMES}
+        return
+
+    modules = {}
+    for key, value in reading.items():
+        if key[:1].isdigit() and "_" in key:
+            index, metric = key.split("_", 1)
+            modules.setdefault(index, {})[metric] = value
+    for values in modules.values():
+        mi_sn = values.pop("mi_sn", None)
+        if mi_sn is not None and len(values) == len(METRIC_NAMES):
+            yield mi_sn, values
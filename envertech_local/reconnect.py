@@ -0,0 +1,136 @@
+#reconnect.py
+import random
+import time
+from typing import Optional
+
+CONNECTED = "connected"
+DISCONNECTED = "disconnected"
+CIRCUIT_OPEN = "circuit_open"
+PROBING = "probing"
+
+
+class ConnectionEvent:
+    """
+    Connection state change yielded by a stream running with a ReconnectPolicy.
+
+    State is one of:
+        "connected": the connection is open and polling (re)started.
+        "disconnected": the connection failed; retry_in seconds until the next attempt.
+        "circuit_open": too many consecutive failures; the device is only
+            probed every probe_interval seconds from now on.
+        "probing": a probe connection is attempted while the circuit is open.
+    """
+
+    __slots__ = ("serial", "state", "error", "failures", "retry_in", "timestamp")
+
+    def __init__(
+        self,
+        serial: str,
+        state: str,
+        error: Optional[str] = None,
+        failures: int = 0,
+        retry_in: Optional[float] = None
+    ):
+        self.serial = serial
+        self.state = state
+        self.error = error
+        self.failures = failures
+        self.retry_in = retry_in
+        self.timestamp = time.time()
+
+    def __repr__(self):
+        return (
+            f"ConnectionEvent(serial={self.serial!r}, state={self.state!r}, "
+            f"failures={self.failures}, retry_in={self.retry_in}, error={self.error!r})"
+        )
+
+
+class CircuitBreaker:
+    """Counts consecutive failures of one device and opens after failure_threshold."""
+
+    def __init__(self, failure_threshold: int, probe_interval: float):
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> bool:
+        """Count a failure and return True if this failure opened the circuit."""
+        self.failures += 1
+        if self.opened_at is None and self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            return True
+        if self.opened_at is not None:
+            self.opened_at = time.monotonic()  # Failed probe, wait a full interval again
+        return False
+
+    def time_until_probe(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(self.opened_at + self.probe_interval - time.monotonic(), 0.0)
+
+
+class ReconnectPolicy:
+    """
+    Reconnect options for stream_inverter_data.
+
+    With a policy the stream does not end on connection errors: it yields a
+    ConnectionEvent and reconnects after an exponential backoff with random
+    jitter, so that a fleet that lost its network together does not
+    reconnect in lockstep. After failure_threshold consecutive failures the
+    device's circuit opens and it is only probed every probe_interval
+    seconds until a probe succeeds. A connection counts as healthy once it
+    delivers a reading.
+
+    Breakers are kept per serial on the policy, so one policy can be shared
+    by all streams of a fleet and the state survives restarting a stream.
+
+    Args:
+        initial_delay (float): Delay after the first failure.
+        max_delay (float): Upper bound of the backoff delay.
+        multiplier (float): Backoff growth per consecutive failure.
+        jitter (float): Fraction of the delay that is randomised, 0 to 1.
+        failure_threshold (int): Consecutive failures that open the circuit.
+        probe_interval (float): Seconds between probes while the circuit is open.
+    """
+
+    def __init__(
+        self,
+        initial_delay: float = 1.0,
+        max_delay: float = 60.0,
+        multiplier: float = 2.0,
+        jitter: float = 0.5,
+        failure_threshold: int = 5,
+        probe_interval: float = 300.0
+    ):
+        if not 0 <= jitter <= 1:
+            raise ValueError("jitter must be between 0 and 1")
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self._breakers = {}
+
+    def breaker(self, serial: str) -> CircuitBreaker:
+        breaker = self._breakers.get(serial)
+        if breaker is None:
+            breaker = CircuitBreaker(self.failure_threshold, self.probe_interval)
+            self._breakers[serial] = breaker
+        return breaker
+
+    def delay(self, failures: int) -> float:
+        """Backoff before the next attempt after `failures` consecutive failures."""
+        delay = min(self.initial_delay * self.multiplier ** min(max(failures - 1, 0), 64), self.max_delay)
+        return delay * (1 - self.jitter * random.random())
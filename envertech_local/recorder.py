@@ -0,0 +1,253 @@
+#recorder.py
+import logging
+import mmap
+import os
+import struct
+import time
+from array import array
+from typing import Iterator, Optional
+from .utils import decode_frames
+
+_LOGGER = logging.getLogger(__name__)
+
+# File layout:
+#   header:       b"ENVREC" + version (u16)
+#   frame record: 0x01, timestamp (f64), serial (4 bytes), control code (u16), length (u32), frame bytes
+#   index block:  0x02, first/last timestamp (f64), offset of the first covered record (u64),
+#                 record count (u32), offset of the previous index block (u64, 0 = none),
+#                 b"ENVX", offset of this index block (u64)
+# Index blocks summarise the records written since the previous block. The
+# file is closed with an index block, so a reader can walk the blocks
+# backwards from the end; a file that was not closed cleanly is scanned.
+FILE_MAGIC = b"ENVREC"
+FILE_VERSION = 1
+HEADER = struct.Struct(">6sH")
+RECORD = struct.Struct(">BdIHI")
+INDEX = struct.Struct(">BddQIQ4sQ")
+INDEX_MARKER = b"ENVX"
+RECORD_FRAME = 0x01
+RECORD_INDEX = 0x02
+
+
+class FrameRecorder:
+    """
+    Appends raw frames with timestamp, serial and control code to a binary log.
+
+    Writes are buffered; an index block is added every `index_every` frames
+    and on close().
+
+    Args:
+        path (str): Log file, created if missing and appended to otherwise.
+        index_every (int): Frames per index block.
+    """
+
+    def __init__(self, path: str, index_every: int = 1024):
+        self.path = path
+        self.index_every = index_every
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        self._file = open(path, "ab")
+        self._offset = self._file.tell()
+        self._prev_index = 0
+        if exists:
+            self._prev_index = _trailing_index_offset(path)
+        else:
+            self._write(HEADER.pack(FILE_MAGIC, FILE_VERSION))
+        self._reset_chunk()
+
+    def _reset_chunk(self):
+        self._chunk_start = self._offset
+        self._chunk_count = 0
+        self._chunk_first = 0.0
+        self._chunk_last = 0.0
+
+    def _write(self, data: bytes):
+        self._file.write(data)
+        self._offset += len(data)
+
+    def write(self, frame, serial: str, timestamp: Optional[float] = None):
+        """Append one frame as received from the inverter with the given serial."""
+        timestamp = time.time() if timestamp is None else timestamp
+        control_code = int.from_bytes(frame[4:6], "big") if len(frame) >= 6 else 0
+        if not self._chunk_count:
+            self._chunk_first = timestamp
+        self._write(RECORD.pack(RECORD_FRAME, timestamp, int(serial, 16), control_code, len(frame)))
+        self._write(frame)
+        self._chunk_last = timestamp
+        self._chunk_count += 1
+        if self._chunk_count >= self.index_every:
+            self._write_index()
+
+    def _write_index(self):
+        if not self._chunk_count:
+            return
+        index_offset = self._offset
+        self._write(INDEX.pack(
+            RECORD_INDEX, self._chunk_first, self._chunk_last, self._chunk_start,
+            self._chunk_count, self._prev_index, INDEX_MARKER, index_offset
+        ))
+        self._prev_index = index_offset
+        self._reset_chunk()
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._write_index()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _trailing_index_offset(path: str) -> int:
+    """Offset of the index block that ends the file, or 0 if it does not end with one."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size < HEADER.size + INDEX.size:
+            return 0
+        f.seek(size - INDEX.size)
+        block = f.read(INDEX.size)
+    fields = INDEX.unpack(block)
+    if fields[0] == RECORD_INDEX and fields[6] == INDEX_MARKER and fields[7] == size - INDEX.size:
+        return fields[7]
+    return 0
+
+
+class FrameLog:
+    """
+    Memory-mapped reader for logs written by FrameRecorder.
+
+    Frames are returned as memoryviews into the mapping, so nothing is
+    copied until a frame is decoded. If some of them are still referenced
+    when the log is closed, the mapping stays alive until they are gone.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        magic, version = HEADER.unpack_from(self._map, 0)
+        if magic != FILE_MAGIC:
+            raise ValueError(f"{path} is not a frame log")
+        if version != FILE_VERSION:
+            raise ValueError(f"Unsupported frame log version {version}")
+        self._chunks = self._read_index()
+
+    def close(self):
+        self._view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            # Returned frames still point into the map; it is unmapped
+            # when the last of them is garbage collected
+            _LOGGER.debug(f"Frame log {self.path} closed with frames still in use")
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _read_index(self) -> list:
+        """Return [(first_ts, last_ts, offset)] from the index blocks, or [] to scan."""
+        offset = _trailing_index_offset(self.path)
+        chunks = []
+        while offset:
+            _, first, last, start, _, prev, _, _ = INDEX.unpack_from(self._map, offset)
+            chunks.append((first, last, start))
+            offset = prev
+        chunks.reverse()
+        if not chunks or chunks[0][2] != HEADER.size:
+            return []
+        return chunks
+
+    def _records(self, offset: int) -> Iterator[tuple]:
+        data = self._map
+        view = self._view
+        end = len(data)
+        while offset < end:
+            kind = data[offset]
+            if kind == RECORD_INDEX:
+                offset += INDEX.size
+                continue
+            if kind != RECORD_FRAME or offset + RECORD.size > end:
+                _LOGGER.warning(f"Frame log {self.path} is corrupt or truncated at offset {offset}")
+                return
+            _, timestamp, serial, control_code, length = RECORD.unpack_from(data, offset)
+            body = offset + RECORD.size
+            if body + length > end:
+                _LOGGER.warning(f"Frame log {self.path} ends with a truncated frame")
+                return
+            yield timestamp, serial, control_code, view[body:body + length]
+            offset = body + length
+
+    def frames(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        serial: Optional[str] = None,
+        control_code: Optional[int] = None
+    ) -> Iterator[tuple]:
+        """
+        Yield (timestamp, serial, control_code, frame) for matching records in file order.
+
+        Index blocks are used to skip ahead to `start` when the log has them.
+        """
+        offset = HEADER.size
+        if start is not None:
+            for _, last, chunk_offset in self._chunks:
+                if last >= start:
+                    offset = chunk_offset
+                    break
+            else:
+                if self._chunks:
+                    return
+        serial_int = int(serial, 16) if serial is not None else None
+
+        for timestamp, record_serial, record_code, frame in self._records(offset):
+            if start is not None and timestamp < start:
+                continue
+            if end is not None and timestamp >= end:
+                if self._chunks:
+                    return  # Indexed logs are written in time order
+                continue
+            if serial_int is not None and record_serial != serial_int:
+                continue
+            if control_code is not None and record_code != control_code:
+                continue
+            yield timestamp, f"{record_serial:08X}", record_code, frame
+
+    def decode(self, batch_size: int = 10000, **filters) -> Iterator[dict]:
+        """
+        Decode the module data of recorded 4177 frames in batches.
+
+        Accepts the same filters as frames(). Each batch is a dict of columns
+        as returned by decode_frames, plus "timestamp" and "serial" per row.
+        """
+        filters["control_code"] = 4177
+        batch, timestamps, serials = [], [], []
+        for timestamp, serial, _, frame in self.frames(**filters):
+            batch.append(frame)
+            timestamps.append(timestamp)
+            serials.append(serial)
+            if len(batch) >= batch_size:
+                yield _decode_batch(batch, timestamps, serials)
+                batch, timestamps, serials = [], [], []
+        if batch:
+            yield _decode_batch(batch, timestamps, serials)
+
+
+def _decode_batch(frames, timestamps, serials) -> dict:
+    columns = decode_frames(frames)
+    rows = columns["frame"]
+    columns["timestamp"] = array("d", [timestamps[i] for i in rows])
+    columns["serial"] = [serials[i] for i in rows]
+    return columns
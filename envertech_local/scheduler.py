@@ -0,0 +1,159 @@
+#scheduler.py
+import asyncio
+import logging
+import random
+from collections import deque
+from typing import Optional
+from .commands import build_inverter_request
+from .protocol import InverterClient
+
+_LOGGER = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("drop_oldest", "latest")
+
+
+class StreamSchedule:
+    """
+    Request pacing options for stream_inverter_data.
+
+    Args:
+        max_in_flight (int): Requests allowed without an answer before the
+            sender waits. Unanswered requests count as lost after `timeout`.
+        adaptive (bool): Stretch the interval to rtt_factor times the
+            measured response time when the device is slower than interval.
+        rtt_factor (float): Multiplier applied to the smoothed response time.
+        queue_size (int): Maximum number of undelivered responses.
+        overflow (str): "drop_oldest" discards the oldest queued response
+            when full, "latest" keeps only the newest one.
+        start_jitter (float | None): Random delay before the first request,
+            up to this many seconds. None uses up to one interval so that
+            many streams started together do not poll in lockstep.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 1,
+        adaptive: bool = True,
+        rtt_factor: float = 2.0,
+        queue_size: int = 16,
+        overflow: str = "drop_oldest",
+        start_jitter: Optional[float] = None
+    ):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}")
+        self.max_in_flight = max_in_flight
+        self.adaptive = adaptive
+        self.rtt_factor = rtt_factor
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.start_jitter = start_jitter
+
+
+class BoundedQueue:
+    """asyncio queue that never blocks the producer and drops by policy when full."""
+
+    def __init__(self, maxsize: int, overflow: str = "drop_oldest"):
+        self.maxsize = 1 if overflow == "latest" else maxsize
+        self._items = deque()
+        self._event = asyncio.Event()
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def put_nowait(self, item):
+        if len(self._items) >= self.maxsize:
+            self._items.popleft()
+            self.dropped += 1
+        self._items.append(item)
+        self._event.set()
+
+    async def get(self):
+        while not self._items:
+            self._event.clear()
+            await self._event.wait()
+        return self._items.popleft()
+
+
+class PacedPoller:
+    """
+    Sends data requests paced by the device's answers instead of a fixed clock.
+
+    sender() and receiver() are meant to run as tasks; frames and error
+    dicts are delivered through `queue`.
+    """
+
+    def __init__(
+        self,
+        client: InverterClient,
+        sn: str,
+        interval: float,
+        request_timeout: float,
+        schedule: StreamSchedule
+    ):
+        self.client = client
+        self.sn = sn
+        self.interval = interval
+        self.request_timeout = request_timeout
+        self.schedule = schedule
+        self.queue = BoundedQueue(schedule.queue_size, schedule.overflow)
+        self.rtt = None
+        self.lost_requests = 0
+        self._sent = deque()
+        self._answered = asyncio.Event()
+
+    @property
+    def current_interval(self) -> float:
+        if self.schedule.adaptive and self.rtt is not None:
+            return max(self.interval, self.rtt * self.schedule.rtt_factor)
+        return self.interval
+
+    def _expire_lost(self, now: float):
+        while self._sent and now - self._sent[0] > self.request_timeout:
+            self._sent.popleft()
+            self.lost_requests += 1
+
+    async def sender(self):
+        loop = asyncio.get_running_loop()
+        jitter = self.schedule.start_jitter
+        if jitter is None:
+            jitter = self.interval
+        try:
+            if jitter > 0:
+                await asyncio.sleep(random.uniform(0, jitter))
+            while True:
+                now = loop.time()
+                self._expire_lost(now)
+                if len(self._sent) >= self.schedule.max_in_flight:
+                    self._answered.clear()
+                    wait = self.request_timeout - (now - self._sent[0])
+                    try:
+                        await asyncio.wait_for(self._answered.wait(), timeout=max(wait, 0))
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                await self.client.send_command(build_inverter_request(self.sn))
+                self._sent.append(loop.time())
+                await asyncio.sleep(self.current_interval)
+        except Exception as e:
+            self.queue.put_nowait({"error": f"Sender failed: {e}"})
+
+    async def receiver(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                raw_data = await self.client.receive_data(timeout=1)
+                if not raw_data:
+                    continue
+                if self._sent:
+                    sample = loop.time() - self._sent.popleft()
+                    self.rtt = sample if self.rtt is None else 0.8 * self.rtt + 0.2 * sample
+                    self._answered.set()
+                self.queue.put_nowait(raw_data)
+        except Exception as e:
+            self.queue.put_nowait({"error": f"Receiver failed: {e}"})
@@ -0,0 +1,389 @@
+#server.py
+import argparse
+import asyncio
+import json
+import logging
+import time
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+from .api import stream_inverter_data
+from .readings import METRIC_NAMES, InverterReading
+from .reconnect import ConnectionEvent, ReconnectPolicy
+
+_LOGGER = logging.getLogger(__name__)
+
+MAX_WAIT = 300
+MAX_HEADER_LINES = 100
+
+_REASONS = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+}
+
+
+def _round(value: float) -> float:
+    return round(value, 2)
+
+
+class _Entry:
+    """Latest reading of one device with its serialised forms."""
+
+    __slots__ = ("serial", "reading", "timestamp", "state", "version", "body", "module_bodies", "changed")
+
+    def __init__(self, serial: str):
+        self.serial = serial
+        self.reading = None
+        self.timestamp = None
+        self.state = None
+        self.version = 0
+        self.body = None
+        self.module_bodies = {}
+        self.changed = asyncio.Event()
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.serial}-{self.version}"'
+
+    def as_dict(self) -> dict:
+        reading = self.reading
+        data = {"serial_number": self.serial, "state": self.state, "timestamp": self.timestamp}
+        if reading is not None:
+            data["firmware_version"] = reading.firmware_version
+            data["total_power"] = _round(reading.total_power)
+            data["total_energy"] = _round(reading.total_energy)
+            data["modules"] = [self.module_dict(module) for module in reading]
+        return data
+
+    @staticmethod
+    def module_dict(module) -> dict:
+        data = {"index": module.index, "mi_sn": module.mi_sn}
+        for name in METRIC_NAMES:
+            data[name] = _round(getattr(module, name))
+        return data
+
+
+class ReadingCache:
+    """
+    In-memory cache of the latest reading per device.
+
+    Every update bumps the device's version and wakes waiting readers.
+    JSON bodies are built once per version and shared by all readers.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self.version = 0
+        self._fleet_body = None
+        self._fleet_version = -1
+        self._changed = asyncio.Event()
+
+    def entry(self, serial: str) -> Optional[_Entry]:
+        return self._entries.get(serial)
+
+    @property
+    def serials(self) -> list:
+        return list(self._entries)
+
+    def update(self, serial: str, reading: Optional[InverterReading] = None, state: Optional[str] = None):
+        entry = self._entries.get(serial)
+        if entry is None:
+            entry = self._entries[serial] = _Entry(serial)
+        if reading is not None:
+            entry.reading = reading
+            entry.timestamp = time.time()
+        if state is not None:
+            entry.state = state
+        entry.version += 1
+        entry.body = None
+        entry.module_bodies = {}
+        self.version += 1
+
+        # Wake everyone waiting for the previous version
+        entry.changed.set()
+        entry.changed = asyncio.Event()
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    @property
+    def fleet_etag(self) -> str:
+        return f'"fleet-{self.version}"'
+
+    def device_body(self, entry: _Entry) -> bytes:
+        if entry.body is None:
+            entry.body = json.dumps(entry.as_dict()).encode()
+        return entry.body
+
+    def module_body(self, entry: _Entry, module: str) -> Optional[bytes]:
+        body = entry.module_bodies.get(module)
+        if body is not None:
+            return body
+        reading = entry.reading
+        if reading is None:
+            return None
+        columns = reading.columns
+        if module.isdigit() and int(module) < len(reading):
+            index = int(module)
+        elif module in columns["mi_sn"]:
+            index = columns["mi_sn"].index(module)
+        else:
+            return None
+        data = {"serial_number": entry.serial, "timestamp": entry.timestamp, **entry.module_dict(reading[index])}
+        body = entry.module_bodies[module] = json.dumps(data).encode()
+        return body
+
+    def fleet_body(self) -> bytes:
+        if self._fleet_version != self.version:
+            entries = self._entries.values()
+            readings = [entry.reading for entry in entries if entry.reading is not None]
+            data = {
+                "devices": len(self._entries),
+                "reporting": len(readings),
+                "connected": sum(1 for entry in entries if entry.state == "connected"),
+                "total_power": _round(sum(reading.total_power for reading in readings)),
+                "total_energy": _round(sum(reading.total_energy for reading in readings)),
+                "modules": sum(len(reading) for reading in readings),
+                "timestamp": max((entry.timestamp for entry in entries if entry.timestamp), default=None),
+            }
+            self._fleet_body = json.dumps(data).encode()
+            self._fleet_version = self.version
+        return self._fleet_body
+
+    def readings_body(self) -> bytes:
+        return b"{" + b",".join(
+            json.dumps(serial).encode() + b":" + self.device_body(entry)
+            for serial, entry in self._entries.items()
+        ) + b"}"
+
+    async def wait_device(self, entry: _Entry, etag: str, timeout: float) -> bool:
+        """Wait until the entry no longer matches etag; return False on timeout."""
+        while entry.etag == etag:
+            try:
+                await asyncio.wait_for(entry.changed.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    async def wait_fleet(self, etag: str, timeout: float) -> bool:
+        while self.fleet_etag == etag:
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+
+class ReadingServer:
+    """
+    Embedded HTTP endpoint serving the latest readings from one background poller.
+
+    One stream_inverter_data stream per device (with a ReconnectPolicy)
+    fills a ReadingCache; HTTP readers are answered from the cache only, so
+    any number of them cause no extra inverter traffic.
+
+    Endpoints (GET, JSON):
+        /fleet                                  fleet totals
+        /readings                               all devices
+        /readings/{serial}                      one device with its modules
+        /readings/{serial}/modules/{index|mi_sn} one module
+
+    Responses carry an ETag. A request with a matching If-None-Match gets
+    304 Not Modified, or with ?wait=N it is held until the next update
+    (long-poll) and answered with 304 if none arrives within N seconds.
+
+    Args:
+        devices (list): Device dicts with 'ip' and 'serial_number'.
+        host (str): Address to listen on.
+        http_port (int): Port to listen on, 0 for any free port.
+        port (int): TCP port of the gateways.
+        interval (float): Poll interval of the background streams.
+        timeout (int): Receive timeout of the background streams.
+        reconnect (ReconnectPolicy | None): Reconnect options; defaults apply if omitted.
+    """
+
+    def __init__(
+        self,
+        devices: list,
+        host: str = "127.0.0.1",
+        http_port: int = 8080,
+        port: int = 14889,
+        interval: float = 5,
+        timeout: int = 10,
+        reconnect: Optional[ReconnectPolicy] = None
+    ):
+        self.devices = devices
+        self.host = host
+        self.http_port = http_port
+        self.port = port
+        self.interval = interval
+        self.timeout = timeout
+        self.reconnect = reconnect if reconnect is not None else ReconnectPolicy()
+        self.cache = None
+        self._server = None
+        self._tasks = []
+
+    async def start(self):
+        self.cache = ReadingCache()
+        for device in self.devices:
+            self.cache.update(device["serial_number"])
+            self._tasks.append(asyncio.create_task(self._poll(device)))
+        self._server = await asyncio.start_server(self._handle, self.host, self.http_port)
+        self.http_port = self._server.sockets[0].getsockname()[1]
+        _LOGGER.info(f"Serving readings of {len(self.devices)} devices on http://{self.host}:{self.http_port}")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    async def _poll(self, device: dict):
+        serial = device["serial_number"]
+        stream = stream_inverter_data(
+            device,
+            port=self.port,
+            interval=self.interval,
+            timeout=self.timeout,
+            structured=True,
+            reconnect=self.reconnect
+        )
+        try:
+            async for update in stream:
+                if isinstance(update, ConnectionEvent):
+                    self.cache.update(serial, state=update.state)
+                elif isinstance(update, InverterReading):
+                    self.cache.update(serial, reading=update)
+        finally:
+            await stream.aclose()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                for _ in range(MAX_HEADER_LINES):
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                parts = request_line.decode("latin-1").split()
+                if len(parts) != 3:
+                    await self._respond(writer, 400, b'{"error": "Malformed request"}')
+                    break
+                method, target, version = parts
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                if method not in ("GET", "HEAD"):
+                    await self._respond(writer, 405, b'{"error": "Only GET is supported"}')
+                else:
+                    status, body, etag = await self._route(target, headers.get("if-none-match"))
+                    await self._respond(writer, status, body, etag, head=method == "HEAD", keep_alive=keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, target: str, if_none_match: Optional[str]):
+        url = urlsplit(target)
+        path = [part for part in url.path.split("/") if part]
+        query = parse_qs(url.query)
+        try:
+            wait = min(float(query["wait"][0]), MAX_WAIT) if "wait" in query else 0
+        except ValueError:
+            return 400, b'{"error": "wait must be a number"}', None
+        cache = self.cache
+
+        if path == ["fleet"] or path == ["readings"]:
+            if if_none_match == cache.fleet_etag:
+                if not wait or not await cache.wait_fleet(if_none_match, wait):
+                    return 304, b"", cache.fleet_etag
+            body = cache.fleet_body() if path == ["fleet"] else cache.readings_body()
+            return 200, body, cache.fleet_etag
+
+        if path[:1] == ["readings"] and len(path) in (2, 4) and (len(path) == 2 or path[2] == "modules"):
+            entry = cache.entry(path[1])
+            if entry is None:
+                return 404, b'{"error": "Unknown serial number"}', None
+            if if_none_match == entry.etag:
+                if not wait or not await cache.wait_device(entry, if_none_match, wait):
+                    return 304, b"", entry.etag
+            if len(path) == 2:
+                return 200, cache.device_body(entry), entry.etag
+            body = cache.module_body(entry, path[3])
+            if body is None:
+                return 404, b'{"error": "Unknown module"}', None
+            return 200, body, entry.etag
+
+        return 404, b'{"error": "Not found"}', None
+
+    @staticmethod
+    async def _respond(
+        writer,
+        status: int,
+        body: bytes,
+        etag: Optional[str] = None,
+        head: bool = False,
+        keep_alive: bool = False
+    ):
+        headers = [
+            f"HTTP/1.1 {status} {_REASONS[status]}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            "Cache-Control: no-cache",
+            "Connection: keep-alive" if keep_alive else "Connection: close",
+        ]
+        if etag is not None:
+            headers.append(f"ETag: {etag}")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode())
+        if not head and status != 304:
+            writer.write(body)
+        await writer.drain()
+
+
+async def _run(args):
+    from .discovery import discover_devices_async
+
+    devices = await discover_devices_async(timeout=args.discovery_timeout)
+    if not devices:
+        print("No inverters found")
+        return
+    server = ReadingServer(devices, args.host, args.http_port, args.port, args.interval)
+    async with server:
+        print(f"Serving {len(devices)} inverters on http://{server.host}:{server.http_port}")
+        await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the latest Envertech readings over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--http-port", type=int, default=8080)
+    parser.add_argument("--port", type=int, default=14889, help="TCP port of the gateways")
+    parser.add_argument("--interval", type=float, default=5)
+    parser.add_argument("--discovery-timeout", type=float, default=3)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_run(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
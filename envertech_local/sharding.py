@@ -0,0 +1,232 @@
+#sharding.py
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from typing import AsyncGenerator, Optional
+from .api import stream_inverter_data
+from .readings import InverterReading
+
+_LOGGER = logging.getLogger(__name__)
+
+# Messages sent from a shard to the parent, in batches (lists):
+#   ("reading", serial, timestamp, columns, firmware_version)
+#   ("frame", serial, timestamp, frame bytes)
+#   ("error", serial, timestamp, message)
+FLUSH_INTERVAL = 0.05
+FLUSH_SIZE = 256
+
+
+class _PipeBatcher:
+    """Collects messages in a shard and sends them to the parent in batches."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.pending = []
+
+    def add(self, message: tuple):
+        self.pending.append(message)
+        if len(self.pending) >= FLUSH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            batch, self.pending = self.pending, []
+            self.conn.send(batch)
+
+    def write(self, frame, serial: str, timestamp: Optional[float] = None):
+        """Recorder interface, used in raw mode to forward every received frame."""
+        self.add(("frame", serial, time.time() if timestamp is None else timestamp, bytes(frame)))
+
+
+async def _poll_device(device: dict, options: dict, batcher: _PipeBatcher):
+    serial = device["serial_number"]
+    raw = options["raw"]
+    while True:
+        stream = stream_inverter_data(
+            device,
+            port=options["port"],
+            interval=options["interval"],
+            timeout=options["timeout"],
+            structured=True,
+            recorder=batcher if raw else None
+        )
+        try:
+            async for reading in stream:
+                if isinstance(reading, dict):
+                    if "error" in reading:
+                        batcher.add(("error", serial, time.time(), reading["error"]))
+                        break
+                    continue
+                if not raw:
+                    batcher.add(("reading", serial, time.time(), reading.columns, reading.firmware_version))
+        except Exception as e:
+            batcher.add(("error", serial, time.time(), str(e)))
+        finally:
+            await stream.aclose()
+        await asyncio.sleep(options["retry_delay"])
+
+
+async def _shard_loop(devices: list, options: dict, conn):
+    batcher = _PipeBatcher(conn)
+    tasks = [asyncio.create_task(_poll_device(device, options, batcher)) for device in devices]
+    try:
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            batcher.flush()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _shard_main(index: int, devices: list, options: dict, conn):
+    """Entry point of a shard process."""
+    logging.basicConfig(level=options["log_level"])
+    _LOGGER.debug(f"Shard {index} polling {len(devices)} devices in process {os.getpid()}")
+    try:
+        asyncio.run(_shard_loop(devices, options, conn))
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
+
+
+class _Shard:
+    def __init__(self, index: int, devices: list):
+        self.index = index
+        self.devices = devices
+        self.process = None
+        self.conn = None
+        self.thread = None
+        self.restarts = 0
+
+
+class ShardedPoller:
+    """
+    Polls a large fleet from several worker processes.
+
+    Devices are split across `shards` processes, each running its own event
+    loop and connections. Shards send back only decoded module columns (or
+    raw frames with raw=True) over a pipe in batches, and the parent merges
+    them into one async stream. A shard that dies is restarted on its own
+    after restart_delay seconds.
+
+    Worker processes are started with the "spawn" method, so scripts using
+    this class must guard their entry point with `if __name__ == "__main__":`.
+
+    Iterating yields (serial, timestamp, update) where update is an
+    InverterReading, the raw frame bytes in raw mode, or {"error": ...}.
+    """
+
+    def __init__(
+        self,
+        devices: list,
+        shards: Optional[int] = None,
+        port: int = 14889,
+        interval: float = 5,
+        timeout: int = 10,
+        raw: bool = False,
+        retry_delay: float = 5,
+        restart_delay: float = 1
+    ):
+        shards = shards or os.cpu_count() or 1
+        shards = max(1, min(shards, len(devices)))
+        self.options = {
+            "port": port,
+            "interval": interval,
+            "timeout": timeout,
+            "raw": raw,
+            "retry_delay": retry_delay,
+            "log_level": logging.getLogger().level,
+        }
+        self.restart_delay = restart_delay
+        self._shards = [_Shard(i, devices[i::shards]) for i in range(shards)]
+        self._context = multiprocessing.get_context("spawn")
+        self._queue = None
+        self._loop = None
+        self._stopping = False
+
+    @property
+    def shards(self) -> int:
+        return len(self._shards)
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._stopping = False
+        for shard in self._shards:
+            self._start_shard(shard)
+
+    def _start_shard(self, shard: _Shard):
+        reader, writer = self._context.Pipe(duplex=False)
+        shard.process = self._context.Process(
+            target=_shard_main,
+            args=(shard.index, shard.devices, self.options, writer),
+            name=f"envertech-shard-{shard.index}",
+            daemon=True
+        )
+        shard.process.start()
+        writer.close()
+        shard.conn = reader
+        shard.thread = threading.Thread(
+            target=self._read_shard, args=(shard, reader), name=f"envertech-shard-reader-{shard.index}", daemon=True
+        )
+        shard.thread.start()
+
+    def _read_shard(self, shard: _Shard, conn):
+        """Forward batches from a shard pipe into the event loop until the pipe closes."""
+        loop = self._loop
+        try:
+            while True:
+                batch = conn.recv()
+                loop.call_soon_threadsafe(self._queue.put_nowait, batch)
+        except (EOFError, OSError):
+            pass
+        if not self._stopping:
+            loop.call_soon_threadsafe(lambda: asyncio.ensure_future(self._restart(shard, conn)))
+
+    async def _restart(self, shard: _Shard, conn):
+        if self._stopping or shard.conn is not conn:
+            return
+        conn.close()
+        process = shard.process
+        await self._loop.run_in_executor(None, process.join)
+        shard.restarts += 1
+        _LOGGER.warning(
+            f"Shard {shard.index} exited with code {process.exitcode}, restarting in {self.restart_delay}s"
+        )
+        await asyncio.sleep(self.restart_delay)
+        if not self._stopping:
+            self._start_shard(shard)
+
+    async def stop(self):
+        self._stopping = True
+        for shard in self._shards:
+            if shard.process is not None and shard.process.is_alive():
+                shard.process.terminate()
+        for shard in self._shards:
+            if shard.process is not None:
+                await self._loop.run_in_executor(None, shard.process.join)
+            if shard.conn is not None:
+                shard.conn.close()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    async def __aiter__(self) -> AsyncGenerator[tuple, None]:
+        if self._queue is None:
+            raise RuntimeError("ShardedPoller must be started first")
+        while True:
+            batch = await self._queue.get()
+            for message in batch:
+                kind, serial, timestamp = message[:3]
+                if kind == "reading":
+                    yield serial, timestamp, InverterReading(message[3], message[4])
+                elif kind == "frame":
+                    yield serial, timestamp, message[3]
+                else:
+                    yield serial, timestamp, {"error": message[3]}
@@ -0,0 +1,307 @@
+#simulator.py
+import argparse
+import asyncio
+import logging
+import math
+import random
+import time
+from typing import Optional
+from .discovery import DEST_PORTS, UDP_DISCOVERY_MSG, UDP_DISCOVERY_MSG_WIFI
+from .framing import FrameReassembler
+from .utils import MODULE_METRICS, MODULE_RECORD, check_cs
+
+_LOGGER = logging.getLogger(__name__)
+
+_SCALES = {name: (scale, offset) for name, scale, offset in MODULE_METRICS}
+
+
+def _encode(metric: str, value: float, limit: int = 0xFFFF) -> int:
+    scale, offset = _SCALES[metric]
+    return max(0, min(limit, int(round((value - offset) / scale))))
+
+
+class VirtualInverter:
+    """
+    A simulated gateway with a number of microinverter modules.
+
+    Args:
+        serial (str): 8-digit hex serial used in requests and discovery.
+        module_count (int): Number of modules reported in 4177 frames.
+        firmware (tuple): Firmware bytes reported as "a/b".
+        latency (float): Seconds before each response is sent.
+        jitter (float): Extra random delay of up to this many seconds.
+        split_size (int): Send responses in chunks of this many bytes (0 = whole frame).
+        drop_rate (float): Probability of not answering a data request.
+        no_data_rate (float): Probability of answering with 4102 instead of data.
+        seed: Seed for the device's random generator.
+    """
+
+    def __init__(
+        self,
+        serial: str,
+        module_count: int = 2,
+        firmware: tuple = (162, 122),
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        split_size: int = 0,
+        drop_rate: float = 0.0,
+        no_data_rate: float = 0.0,
+        seed=None
+    ):
+        if len(serial) != 8:
+            raise ValueError("serial must be an 8-digit hex string")
+        self.serial = serial.upper()
+        self.module_count = module_count
+        self.firmware = firmware
+        self.latency = latency
+        self.jitter = jitter
+        self.split_size = split_size
+        self.drop_rate = drop_rate
+        self.no_data_rate = no_data_rate
+        self.power_level = 255
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._serial_int = int(serial, 16)
+        self._energy = [self._random.uniform(50, 500) for _ in range(module_count)]
+        self._last_update = time.monotonic()
+
+    @property
+    def key(self) -> bytes:
+        return bytes.fromhex(self.serial)
+
+    def delay(self) -> float:
+        return self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def module_records(self) -> bytes:
+        """Encode the current module values as 32-byte 4177 records."""
+        now = time.monotonic()
+        elapsed = now - self._last_update
+        self._last_update = now
+
+        # A slow daily curve plus noise keeps consecutive readings plausible
+        sun = 0.5 + 0.5 * math.sin(time.time() / 3600)
+        limit = self.power_level / 255
+        records = []
+        for i in range(self.module_count):
+            power = max(0.0, 300 * sun * limit + self._random.uniform(-5, 5))
+            self._energy[i] += power * elapsed / 3_600_000
+            records.append(MODULE_RECORD.pack(
+                ((self._serial_int + i) & 0xFFFFFFFF).to_bytes(4, "big"),
+                _encode("input_voltage", 30 + 10 * sun + self._random.uniform(-0.5, 0.5)),
+                _encode("power", power),
+                _encode("energy", self._energy[i], 0xFFFFFFFF),
+                _encode("temperature", 20 + 30 * sun + self._random.uniform(-1, 1)),
+                _encode("grid_voltage", 230 + self._random.uniform(-3, 3)),
+                _encode("frequency", 50 + self._random.uniform(-0.05, 0.05)),
+            ))
+        return b"".join(records)
+
+    def frame(self, control_code: int, body: bytes) -> bytes:
+        """Build a response frame directly, without going through the command builders."""
+        frame = bytearray(b"\x68" + (12 + len(body)).to_bytes(2, "big") + b"\x68")
+        frame += control_code.to_bytes(2, "big")
+        frame += self.key
+        frame += body
+        frame.append(check_cs(frame))
+        frame.append(0x16)
+        return bytes(frame)
+
+    def data_frame(self) -> bytes:
+        """Build a 4177 response with the current module values."""
+        header = bytes([self.firmware[0], 0, self.firmware[1]]) + bytes(7)
+        return self.frame(4177, header + self.module_records())
+
+    def respond(self, control_code: int, payload) -> Optional[bytes]:
+        """Return the response frame for a request, or None to stay silent."""
+        if control_code == 4215:
+            self.requests += 1
+            if self.drop_rate and self._random.random() < self.drop_rate:
+                return None
+            if self.no_data_rate and self._random.random() < self.no_data_rate:
+                return self.frame(4102, bytes(10))
+            return self.data_frame()
+        if control_code == 4407 and len(payload) >= 1:
+            self.power_level = payload[0]
+            return self.frame(4407, bytes([self.power_level]))
+        return None
+
+    def localcon_reply(self, ip: str, port: int) -> bytes:
+        return bytes(int(part) for part in ip.split(".")) + port.to_bytes(2, "big") + self.key
+
+    def wifi_reply(self, ip: str) -> bytes:
+        mac = "ACCF23" + self.serial[-6:]
+        return f"{ip},{mac},{self.serial}".encode()
+
+
+class _DiscoveryResponder(asyncio.DatagramProtocol):
+    def __init__(self, simulator, msg_type: str):
+        self.simulator = simulator
+        self.msg_type = msg_type
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        sim = self.simulator
+        expected = UDP_DISCOVERY_MSG if self.msg_type == "localcon" else UDP_DISCOVERY_MSG_WIFI
+        if data != expected:
+            return
+        for device in sim.devices.values():
+            if self.msg_type == "localcon":
+                reply = device.localcon_reply(sim.host, sim.port)
+            else:
+                reply = device.wifi_reply(sim.host)
+            self.transport.sendto(reply, addr)
+
+
+class InverterSimulator:
+    """
+    Serves any number of VirtualInverters on one TCP listener.
+
+    Requests are routed to a device by the serial in the frame, so
+    thousands of devices can share a single loopback port. Optional UDP
+    responders answer the LOCALCON and USR Wi-Fi discovery probes.
+
+    Example:
+        async with InverterSimulator(create_fleet(1000, module_count=8)) as sim:
+            data = await get_inverter_data(sim.device_list()[0], port=sim.port)
+    """
+
+    def __init__(
+        self,
+        devices: list,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        discovery_ports: Optional[dict] = None
+    ):
+        self.devices = {device.key: device for device in devices}
+        self.host = host
+        self.port = port
+        self.discovery_ports = discovery_ports
+        self.connections = 0
+        self._server = None
+        self._transports = []
+        self._writers = set()
+
+    def device_list(self) -> list:
+        """Devices in the format returned by discover_devices_async."""
+        return [
+            {"ip": self.host, "serial_number": device.serial, "mac": None, "source": "simulator"}
+            for device in self.devices.values()
+        ]
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, backlog=4096)
+        self.port = self._server.sockets[0].getsockname()[1]
+        _LOGGER.info(f"Simulating {len(self.devices)} inverters on {self.host}:{self.port}")
+
+        if self.discovery_ports is not None:
+            loop = asyncio.get_running_loop()
+            for msg_type, udp_port in self.discovery_ports.items():
+                transport, _ = await loop.create_datagram_endpoint(
+                    lambda msg_type=msg_type: _DiscoveryResponder(self, msg_type),
+                    local_addr=("0.0.0.0", udp_port),
+                    allow_broadcast=True
+                )
+                self._transports.append(transport)
+
+    async def stop(self):
+        for transport in self._transports:
+            transport.close()
+        self._transports = []
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._writers):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        self._writers.add(writer)
+        framer = FrameReassembler()
+        try:
+            while True:
+                chunk = await reader.read(4096)
+                if not chunk:
+                    break
+                for frame in framer.feed(chunk):
+                    control_code = int.from_bytes(frame[4:6], "big")
+                    device = self.devices.get(bytes(frame[6:10]))
+                    if device is None:
+                        continue
+                    if control_code == 4161:
+                        return  # Break command ends the session
+                    response = device.respond(control_code, frame[10:-2])
+                    if response is None:
+                        continue
+                    delay = device.delay()
+                    if delay:
+                        await asyncio.sleep(delay)
+                    await self._send(writer, response, device.split_size)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    @staticmethod
+    async def _send(writer, data: bytes, split_size: int):
+        if not split_size:
+            writer.write(data)
+            await writer.drain()
+            return
+        for i in range(0, len(data), split_size):
+            writer.write(data[i:i + split_size])
+            await writer.drain()
+            await asyncio.sleep(0)
+
+
+def create_fleet(count: int, start_serial: int = 0x30800000, **kwargs) -> list:
+    """Create `count` VirtualInverters with consecutive serials."""
+    return [VirtualInverter(f"{start_serial + i:08X}", **kwargs) for i in range(count)]
+
+
+async def _run(args):
+    devices = create_fleet(
+        args.devices,
+        module_count=args.modules,
+        latency=args.latency,
+        jitter=args.jitter,
+        split_size=args.split,
+        drop_rate=args.drop,
+    )
+    discovery_ports = dict(DEST_PORTS) if args.discovery else None
+    async with InverterSimulator(devices, args.host, args.port, discovery_ports) as sim:
+        print(f"Serving {len(devices)} simulated inverters on {sim.host}:{sim.port}")
+        await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate Envertech inverter gateways")
+    parser.add_argument("--devices", type=int, default=1)
+    parser.add_argument("--modules", type=int, default=2)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=14889)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--split", type=int, default=0, help="split responses into chunks of N bytes")
+    parser.add_argument("--drop", type=float, default=0.0, help="probability of ignoring a request")
+    parser.add_argument("--discovery", action="store_true", help="answer UDP discovery probes on 48889/48899")
+    args = parser.parse_args()
+    try:
+        asyncio.run(_run(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#store.py
+import time
+from array import array
+from typing import Iterable, Optional
+from .readings import METRIC_NAMES, iter_modules
+
+
+class RingBuffer:
+    """Fixed-capacity buffer of doubles; the oldest value is overwritten when full."""
+
+    __slots__ = ("capacity", "_data", "_start", "_len")
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._data = array("d", [0.0]) * capacity
+        self._start = 0
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, index: int) -> float:
+        if not -self._len <= index < self._len:
+            raise IndexError("ring buffer index out of range")
+        if index < 0:
+            index += self._len
+        return self._data[(self._start + index) % self.capacity]
+
+    def append(self, value: float):
+        if self._len < self.capacity:
+            self._data[(self._start + self._len) % self.capacity] = value
+            self._len += 1
+        else:
+            self._data[self._start] = value
+            self._start = (self._start + 1) % self.capacity
+
+    def segments(self, lo: int = 0, hi: Optional[int] = None) -> list:
+        """
+        Return logical items [lo, hi) as at most two memoryview slices, oldest first.
+
+        The views share memory with the buffer and are only valid until the
+        next append overwrites the slots they cover.
+        """
+        hi = self._len if hi is None else min(hi, self._len)
+        if lo >= hi:
+            return []
+        view = memoryview(self._data)
+        first = (self._start + lo) % self.capacity
+        last = first + (hi - lo)
+        if last <= self.capacity:
+            return [view[first:last]]
+        return [view[first:], view[:last - self.capacity]]
+
+    def bisect_left(self, value: float) -> int:
+        """Logical index of the first item >= value; items must be ascending."""
+        lo, hi = 0, self._len
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self[mid] < value:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+
+class _Rollup:
+    """Min/max/mean per metric over fixed time buckets, updated per sample."""
+
+    def __init__(self, resolution: float, capacity: int):
+        self.resolution = resolution
+        self.bucket = None
+        self.starts = RingBuffer(capacity)
+        self.min = {name: RingBuffer(capacity) for name in METRIC_NAMES}
+        self.max = {name: RingBuffer(capacity) for name in METRIC_NAMES}
+        self.mean = {name: RingBuffer(capacity) for name in METRIC_NAMES}
+        self._acc = {}
+
+    def add(self, timestamp: float, values: dict):
+        bucket = timestamp - timestamp % self.resolution
+        if bucket != self.bucket:
+            if self.bucket is not None:
+                self._flush()
+            self.bucket = bucket
+            self._acc = {name: [value, value, value, 1] for name, value in values.items()}
+            return
+        for name, value in values.items():
+            acc = self._acc[name]
+            if value < acc[0]:
+                acc[0] = value
+            if value > acc[1]:
+                acc[1] = value
+            acc[2] += value
+            acc[3] += 1
+
+    def _flush(self):
+        self.starts.append(self.bucket)
+        for name, (low, high, total, count) in self._acc.items():
+            self.min[name].append(low)
+            self.max[name].append(high)
+            self.mean[name].append(total / count)
+
+    def current(self) -> dict:
+        """Statistics of the bucket that is still filling up."""
+        return {
+            name: {"min": low, "max": high, "mean": total / count}
+            for name, (low, high, total, count) in self._acc.items()
+        }
+
+
+class ModuleSeries:
+    """Raw samples and rollups of a single module."""
+
+    def __init__(self, capacity: int, rollup_resolutions: Iterable[float], rollup_capacity: int):
+        self.timestamps = RingBuffer(capacity)
+        self.values = {name: RingBuffer(capacity) for name in METRIC_NAMES}
+        self.rollups = {
+            resolution: _Rollup(resolution, rollup_capacity) for resolution in rollup_resolutions
+        }
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def add(self, timestamp: float, values: dict):
+        if len(self.timestamps) and timestamp < self.timestamps[-1]:
+            raise ValueError("samples must be added in chronological order")
+        self.timestamps.append(timestamp)
+        for name, value in values.items():
+            self.values[name].append(value)
+        for rollup in self.rollups.values():
+            rollup.add(timestamp, values)
+
+    def range(self, start: Optional[float] = None, end: Optional[float] = None, metrics=None) -> dict:
+        """
+        Samples with start <= timestamp < end as memoryview segments.
+
+        Returns:
+            dict: {"timestamp": [...], metric: [...]} where every entry is a
+            list of at most two memoryviews into the ring buffers.
+        """
+        lo = 0 if start is None else self.timestamps.bisect_left(start)
+        hi = len(self.timestamps) if end is None else self.timestamps.bisect_left(end)
+        result = {"timestamp": self.timestamps.segments(lo, hi)}
+        for name in metrics or METRIC_NAMES:
+            result[name] = self.values[name].segments(lo, hi)
+        return result
+
+    def rollup(
+        self,
+        resolution: float,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        metrics=None
+    ) -> dict:
+        """
+        Completed rollup buckets with start <= bucket start < end.
+
+        Returns:
+            dict: {"timestamp": [...], metric: {"min": [...], "max": [...], "mean": [...]}}
+            with memoryview segments like range().
+        """
+        rollup = self.rollups[resolution]
+        lo = 0 if start is None else rollup.starts.bisect_left(start)
+        hi = len(rollup.starts) if end is None else rollup.starts.bisect_left(end)
+        result = {"timestamp": rollup.starts.segments(lo, hi)}
+        for name in metrics or METRIC_NAMES:
+            result[name] = {
+                "min": rollup.min[name].segments(lo, hi),
+                "max": rollup.max[name].segments(lo, hi),
+                "mean": rollup.mean[name].segments(lo, hi),
+            }
+        return result
+
+
+class ReadingStore:
+    """
+    In-memory time-series store for inverter readings.
+
+    Samples are kept per (inverter serial, mi_sn) in fixed-capacity ring
+    buffers, with 1-minute and 15-minute min/max/mean rollups maintained as
+    samples arrive. Queries return memoryviews into the buffers instead of
+    copies.
+
+    Args:
+        capacity (int): Raw samples kept per module.
+        rollup_resolutions (iterable): Rollup bucket sizes in seconds.
+        rollup_capacity (int): Completed buckets kept per rollup.
+    """
+
+    def __init__(self, capacity: int = 3600, rollup_resolutions=(60, 900), rollup_capacity: int = 1440):
+        self.capacity = capacity
+        self.rollup_resolutions = tuple(rollup_resolutions)
+        self.rollup_capacity = rollup_capacity
+        self._series = {}
+
+    def __len__(self):
+        return len(self._series)
+
+    def keys(self) -> list:
+        return list(self._series)
+
+    def add(self, serial: str, reading, timestamp: Optional[float] = None):
+        """
+        Store every module of a reading.
+
+        Args:
+            serial (str): Inverter (gateway) serial number.
+            reading: InverterReading or the legacy flat dict from parse_data.
+            timestamp (float | None): Sample time, defaults to time.time().
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        for mi_sn, values in iter_modules(reading):
+            key = (serial, mi_sn)
+            series = self._series.get(key)
+            if series is None:
+                series = ModuleSeries(self.capacity, self.rollup_resolutions, self.rollup_capacity)
+                self._series[key] = series
+            series.add(timestamp, values)
+
+    def series(self, serial: str, mi_sn: str) -> ModuleSeries:
+        return self._series[(serial, mi_sn)]
+
+    def range(self, serial: str, mi_sn: str, start=None, end=None, metrics=None) -> dict:
+        return self.series(serial, mi_sn).range(start, end, metrics)
+
+    def rollup(self, serial: str, mi_sn: str, resolution: float, start=None, end=None, metrics=None) -> dict:
+        return self.series(serial, mi_sn).rollup(resolution, start, end, metrics)
+
@@ -0,0 +1,142 @@
+#sync.py
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Optional
+from .api import PollResult, poll_inverter
+from .pool import SessionPool
+from .powercontrol import PowerDispatcher
+
+_LOGGER = logging.getLogger(__name__)
+
+# Extra seconds a blocking call waits beyond the operation's own deadline
+RESULT_MARGIN = 1.0
+
+
+class BlockingClient:
+    """
+    Thread-safe synchronous interface for WSGI apps, workers and scripts.
+
+    One background thread runs an event loop with a SessionPool, so
+    connections stay open between calls instead of being set up by
+    asyncio.run() every time. Any number of threads may call the methods
+    at once: submit_* return a concurrent.futures.Future, the other methods
+    block until the result is there or the deadline has passed.
+
+    Args:
+        port (int): TCP port of the gateways.
+        idle_timeout (float): Seconds before an unused connection is closed.
+        concurrency (int): Power commands sent at the same time.
+
+    Example:
+        with BlockingClient() as client:
+            result = client.poll({"ip": "192.168.1.50", "serial_number": "30801234"})
+            if result.ok:
+                print(result.data["total_power"])
+    """
+
+    def __init__(self, port: int = 14889, idle_timeout: float = 300, concurrency: int = 64):
+        self.port = port
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name="envertech-loop", daemon=True)
+        self._thread.start()
+        self._closed = False
+        self._lock = threading.Lock()
+        self.pool, self.dispatcher = self._call(self._setup(idle_timeout, concurrency), None)
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    async def _setup(self, idle_timeout: float, concurrency: int):
+        pool = SessionPool(idle_timeout=idle_timeout)
+        return pool, PowerDispatcher(pool, self.port, concurrency=concurrency)
+
+    def _submit(self, coro) -> concurrent.futures.Future:
+        with self._lock:
+            if self._closed:
+                coro.close()
+                raise RuntimeError("BlockingClient is closed")
+            return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def _call(self, coro, timeout: Optional[float]):
+        return self._wait(self._submit(coro), timeout)
+
+    @staticmethod
+    def _wait(future: concurrent.futures.Future, timeout: Optional[float]):
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"No result within {timeout}s") from None
+
+    def submit_poll(
+        self,
+        device: dict,
+        deadline: float = 10,
+        hedge_after: Optional[float] = None,
+        structured: bool = False
+    ) -> concurrent.futures.Future:
+        """Start poll_inverter on a pooled connection; the future resolves to a PollResult."""
+        return self._submit(poll_inverter(
+            device, self.port, deadline, hedge_after, pool=self.pool, structured=structured
+        ))
+
+    def poll(
+        self,
+        device: dict,
+        deadline: float = 10,
+        hedge_after: Optional[float] = None,
+        structured: bool = False
+    ) -> PollResult:
+        """Poll one device and block until it answered or `deadline` passed."""
+        future = self.submit_poll(device, deadline, hedge_after, structured)
+        return self._wait(future, deadline + RESULT_MARGIN)
+
+    def poll_many(
+        self,
+        devices: list,
+        deadline: float = 10,
+        hedge_after: Optional[float] = None,
+        structured: bool = False
+    ) -> dict:
+        """Poll many devices concurrently and return serial -> PollResult."""
+        futures = [self.submit_poll(device, deadline, hedge_after, structured) for device in devices]
+        results = (self._wait(future, deadline + RESULT_MARGIN) for future in futures)
+        return {result.serial_number: result for result in results}
+
+    def submit_power_level(self, device: dict, level: int, force: bool = False) -> concurrent.futures.Future:
+        """Start a power-limit change; the future resolves to a PowerDispatcher result dict."""
+        return self._submit(self.dispatcher.set_level(device, level, force))
+
+    def set_power_level(self, device: dict, level: int, force: bool = False) -> dict:
+        """Send a power level and block until it is acknowledged or the dispatcher deadline passed."""
+        future = self.submit_power_level(device, level, force)
+        return self._wait(future, self.dispatcher.deadline + RESULT_MARGIN)
+
+    def dispatch_power_level(self, devices: list, level, force: bool = False) -> dict:
+        """Send levels to many devices, see PowerDispatcher.dispatch."""
+        return self._call(self.dispatcher.dispatch(devices, level, force), None)
+
+    def close(self, timeout: float = 10):
+        """Close all connections and stop the background loop."""
+        with self._lock:
+            if self._closed:
+                return
+            future = asyncio.run_coroutine_threadsafe(self.pool.close(), self._loop)
+            self._closed = True
+        try:
+            future.result(timeout)
+        except Exception as e:
+            _LOGGER.warning(f"Closing connections failed: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        if not self._thread.is_alive():
+            self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,3 +1,6 @@
+import struct
+from array import array
+
 #utils.py
 def check_cs(byte_array):
     return (sum(byte_array) + 85) & 0xFF
@@ -26,3 +29,60 @@ def parse_module_data(data, offset):
         }
     except IndexError:
         return None
+
+
+# 4177 module record: serial, 2 unknown bytes, input voltage, power, energy,
+# temperature, grid voltage, frequency, 12 unknown bytes (32 bytes total)
+MODULE_RECORD = struct.Struct(">4s2xHHIHHH12x")
+
+# (metric, scale, offset) in record order; value = raw * scale + offset
+MODULE_METRICS = (
+    ("input_voltage", 64 / 32768, 0),
+    ("power", 512 / 32768, 0),
+    ("energy", 4 / 32768, 0),
+    ("temperature", 256 / 32768, -40),
+    ("grid_voltage", 512 / 32768, 0),
+    ("frequency", 128 / 32768, 0),
+)
+
+def decode_module_block(block) -> dict:
+    """
+    Decode a block of consecutive 32-byte module records in one pass.
+
+    Args:
+        block: bytes-like object whose length is a multiple of 32.
+
+    Returns:
+        dict: Column per metric; "mi_sn" is a list of hex strings, every
+        other column is an array('d') with the scale factors applied.
+    """
+    rows = MODULE_RECORD.iter_unpack(block)
+    columns = list(zip(*rows))
+    if not columns:
+        columns = [()] * (len(MODULE_METRICS) + 1)
+
+    result = {"mi_sn": [sn.hex() for sn in columns[0]]}
+    for (name, scale, offset), values in zip(MODULE_METRICS, columns[1:]):
+        result[name] = array("d", [v * scale + offset for v in values])
+    return result
+
+def decode_frames(frames) -> dict:
+    """
+    Decode the module data of many 4177 frames at once.
+
+    Frames with another control code are skipped. The result has the same
+    columns as decode_module_block plus "frame", the index of the source
+    frame for every row.
+    """
+    blocks = []
+    frame_index = array("I")
+    for index, frame in enumerate(frames):
+        if len(frame) < 22 or int.from_bytes(frame[4:6], "big") != 4177:
+            continue
+        count = (len(frame) - 22) // 32
+        blocks.append(frame[20:20 + count * 32])
+        frame_index.extend([index] * count)
+
+    result = decode_module_block(b"".join(blocks))
+    result["frame"] = frame_index
+    return result
@@ -1,25 +1,14 @@
 import asyncio
 from tabulate import tabulate
-from envertech_local import discover_devices_async, get_inverter_data
+from envertech_local import discover_devices_async, poll_devices
 
 
-def print_parsed_data_table(parsed_data, device_label=None):
-    # Step 1: Group keys per panel
-    panel_data = {}
-    global_data = {}
-
-    for key, value in parsed_data.items():
-        if "_" in key and key[0].isdigit():
-            panel_index, metric = key.split("_", 1)
-            panel_data.setdefault(panel_index, {})[metric] = value
-        else:
-            global_data[key] = value
-
+def print_parsed_data_table(reading, device_label=None):
     # Optional: Label per device
     if device_label:
         print(f"\n🔎 Device: {device_label}")
 
-    # Step 2: Sort panels and prepare table rows
+    # Step 1: Sort panels and prepare table rows
     headers = [
         "Panel",
         "MI SN",
@@ -32,32 +21,28 @@ def print_parsed_data_table(parsed_data, device_label=None):
     ]
 
     table = []
-    for panel_index in sorted(panel_data.keys(), key=int):
-        pdata = panel_data[panel_index]
+    for module in reading:
         row = [
-            f"Panel {panel_index}",
-            pdata.get("mi_sn", "-"),
-            pdata.get("input_voltage", "-"),
-            pdata.get("power", "-"),
-            pdata.get("energy", "-"),
-            pdata.get("temperature", "-"),
-            pdata.get("grid_voltage", "-"),
-            pdata.get("frequency", "-"),
+            f"Panel {module.index}",
+            module.mi_sn,
+            round(module.input_voltage, 2),
+            round(module.power, 2),
+            round(module.energy, 2),
+            round(module.temperature, 2),
+            round(module.grid_voltage, 2),
+            round(module.frequency, 2),
         ]
         table.append(row)
 
-    # Step 3: Print table
-    print(f"\n✅ Found {len(panel_data)} panels\n")
+    # Step 2: Print table
+    print(f"\n✅ Found {len(reading)} panels\n")
     print(tabulate(table, headers=headers, tablefmt="pretty"))
 
-    # Step 4: Show global summary
+    # Step 3: Show global summary
     print("\n📊 Summary:")
-    if "total_power" in global_data:
-        print(f"  🔋 Total Power:   {global_data['total_power']} W")
-    if "total_energy" in global_data:
-        print(f"  ⚡ Total Energy:  {global_data['total_energy']} kWh")
-    if "firmware_version" in global_data:
-        print(f"  🧠 Firmware:      {global_data['firmware_version']}")
+    print(f"  🔋 Total Power:   {round(reading.total_power, 2)} W")
+    print(f"  ⚡ Total Energy:  {round(reading.total_energy, 2)} kWh")
+    print(f"  🧠 Firmware:      {reading.firmware_version}")
 
 
 async def main():
@@ -68,16 +53,19 @@ async def main():
 
     print(f"\n🔍 {len(devices)} device(s) found.")
 
-    for i, device in enumerate(devices, 1):
+    async for device, result in poll_devices(devices, concurrency=16, deadline=60, structured=True):
         label = f"{device.get('ip')} (SN: {device.get('serial_number')})"
-        try:
-            parsed_data, panelcount, control_code = await get_inverter_data(device)
-            if parsed_data and panelcount:
-                print_parsed_data_table(parsed_data, device_label=label)
-            else:
-                print(f"⚠️  No data received from device {label}")
-        except Exception as e:
-            print(f"❌ Error retrieving data from device {label}: {e}")
+        if isinstance(result, dict) and "error" in result:
+            print(f"❌ Error retrieving data from device {label}: {result['error']}")
+            continue
+        if not result:
+            print(f"⚠️  No data received from device {label}")
+            continue
+        reading, panelcount, control_code = result
+        if panelcount:
+            print_parsed_data_table(reading, device_label=label)
+        else:
+            print(f"⚠️  No data received from device {label}")
 
 
 if __name__ == "__main__":
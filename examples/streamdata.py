@@ -4,23 +4,12 @@ import asyncio
 from tabulate import tabulate
 
 
-def print_parsed_data_table(parsed_data, device_label=None):
-    # Step 1: Group panel data
-    panel_data = {}
-    global_data = {}
-
-    for key, value in parsed_data.items():
-        if "_" in key and key[0].isdigit():
-            panel_index, metric = key.split("_", 1)
-            panel_data.setdefault(panel_index, {})[metric] = value
-        else:
-            global_data[key] = value
-
+def print_parsed_data_table(reading, device_label=None):
     # Optional: Label for device
     if device_label:
         print(f"\n🔄 Update from {device_label}")
 
-    # Step 2: Panel table
+    # Step 1: Panel table
     headers = [
         "Panel",
         "MI SN",
@@ -33,17 +22,16 @@ def print_parsed_data_table(parsed_data, device_label=None):
     ]
 
     table = []
-    for panel_index in sorted(panel_data.keys(), key=int):
-        pdata = panel_data[panel_index]
+    for module in reading:
         row = [
-            f"Panel {panel_index}",
-            pdata.get("mi_sn", "-"),
-            pdata.get("input_voltage", "-"),
-            pdata.get("power", "-"),
-            pdata.get("energy", "-"),
-            pdata.get("temperature", "-"),
-            pdata.get("grid_voltage", "-"),
-            pdata.get("frequency", "-"),
+            f"Panel {module.index}",
+            module.mi_sn,
+            round(module.input_voltage, 2),
+            round(module.power, 2),
+            round(module.energy, 2),
+            round(module.temperature, 2),
+            round(module.grid_voltage, 2),
+            round(module.frequency, 2),
         ]
         table.append(row)
 
@@ -52,14 +40,11 @@ def print_parsed_data_table(parsed_data, device_label=None):
     else:
         print("No panel data available.")
 
-    # Step 3: Global data
+    # Step 2: Global data
     print("\n📊 Summary:")
-    if "total_power" in global_data:
-        print(f"  🔋 Total Power:   {global_data['total_power']} W")
-    if "total_energy" in global_data:
-        print(f"  ⚡ Total Energy:  {global_data['total_energy']} kWh")
-    if "firmware_version" in global_data:
-        print(f"  🧠 Firmware:      {global_data['firmware_version']}")
+    print(f"  🔋 Total Power:   {round(reading.total_power, 2)} W")
+    print(f"  ⚡ Total Energy:  {round(reading.total_energy, 2)} kWh")
+    print(f"  🧠 Firmware:      {reading.firmware_version}")
     print("-" * 60)
 
 
@@ -67,10 +52,10 @@ async def main():
     device = {"ip": "127.0.0.1", "serial_number": "30800000"}
     device_label = f"{device['ip']} (SN: {device['serial_number']})"
 
-    async for data in stream_inverter_data(device, interval=5):
+    async for data in stream_inverter_data(device, interval=5, structured=True):
         if isinstance(data, dict) and "error" in data:
             print(f"❌ Error: {data['error']}")
-        else:
+        elif data:
             print_parsed_data_table(data, device_label=device_label)
 
 
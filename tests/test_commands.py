@@ -0,0 +1,36 @@
+from envertech_local import commands
+from envertech_local.commands import (
+    build_inverter_break_command,
+    build_inverter_command,
+    build_inverter_powercontrol_command,
+    build_inverter_request,
+    clear_command_cache,
+)
+
+
+def test_cached_frames_match_builder():
+    clear_command_cache()
+    for _ in range(2):
+        assert build_inverter_request("30801234") == build_inverter_command("30801234", 4215, payload_padding=20)
+        assert build_inverter_break_command("30801234") == build_inverter_command("30801234", 4161, payload_padding=10)
+        for level in (0, 1, 128, 255):
+            assert build_inverter_powercontrol_command("30801234", level) == build_inverter_command(
+                "30801234", 4407, payload=bytes([level])
+            )
+
+
+def test_cache_is_bounded(monkeypatch):
+    clear_command_cache()
+    monkeypatch.setattr(commands, "COMMAND_CACHE_SIZE", 8)
+    for i in range(20):
+        build_inverter_request(f"{0x30800000 + i:08X}")
+    assert len(commands._FRAMES) == 8
+    assert ("30800013", 4215, b"", 20) in commands._FRAMES
+    assert ("30800000", 4215, b"", 20) not in commands._FRAMES
+    clear_command_cache()
+
+
+def test_errors_are_not_cached():
+    clear_command_cache()
+    assert build_inverter_request("123") == b""
+    assert not commands._FRAMES
@@ -0,0 +1,99 @@
+import random
+
+import pytest
+
+from envertech_local import FrameReassembler, InverterClient, InverterReading
+from envertech_local.commands import build_inverter_command
+from envertech_local.utils import parse_module_data
+
+SERIAL = "30801234"
+
+
+def make_frame(module_count, seed=0):
+    rng = random.Random(seed)
+    header = bytes([162, 0, 122]) + bytes(7)
+    records = b"".join(
+        rng.randbytes(4) + bytes(2) + rng.randbytes(14) + bytes(12)
+        for _ in range(module_count)
+    )
+    return build_inverter_command(SERIAL, 4177, payload=header + records)
+
+
+def legacy_parse_data(raw):
+    """parse_data as it was before the columnar decoder."""
+    data = {}
+    number_of_panels = (len(raw) - 22) // 32
+    for i in range(number_of_panels):
+        base = 20 + i * 32
+        offset = {
+            "mi_sn": base,
+            "input_voltage": base + 6,
+            "power": base + 8,
+            "energy": base + 10,
+            "temperature": base + 14,
+            "grid_voltage": base + 16,
+            "frequency": base + 18,
+        }
+        parsed = parse_module_data(raw, offset)
+        if parsed:
+            for k, v in parsed.items():
+                data[f"{i}_{k}"] = round(v, 2) if isinstance(v, (int, float)) else v
+    for key in ["power", "energy"]:
+        total = sum(data.get(f"{i}_{key}", 0) for i in range(number_of_panels))
+        data[f"total_{key}"] = round(total, 2)
+    data["firmware_version"] = f"{raw[10]}/{raw[12]}"
+    return data, number_of_panels, 4177
+
+
+@pytest.mark.parametrize("module_count", [0, 1, 2, 7, 64])
+@pytest.mark.parametrize("container", [bytes, list, memoryview])
+def test_parse_data_matches_legacy_decoder(module_count, container):
+    frame = make_frame(module_count, seed=module_count)
+    client = InverterClient("127.0.0.1", 14889, SERIAL)
+    raw = container(frame) if container is not memoryview else memoryview(frame)
+    assert client.parse_data(raw) == legacy_parse_data(list(frame))
+
+
+def test_parse_data_other_frames():
+    client = InverterClient("127.0.0.1", 14889, SERIAL)
+    no_data = build_inverter_command(SERIAL, 4102, payload_padding=10)
+    assert client.parse_data(no_data) == ({}, None, 4102)
+    assert client.parse_data(b"\x68\x00") == ({}, None, None)
+    assert client.parse_reading(no_data) is None
+
+
+def test_reading_as_dict_and_modules():
+    frame = make_frame(3, seed=1)
+    reading = InverterReading.from_frame(frame)
+    assert reading.as_dict() == legacy_parse_data(list(frame))[0]
+    assert len(reading) == 3
+    assert [module.mi_sn for module in reading] == [frame[20 + i * 32:24 + i * 32].hex() for i in range(3)]
+    assert reading[-1].power == reading.columns["power"][2]
+    assert reading.total_power == pytest.approx(sum(module.power for module in reading))
+
+
+def test_framer_split_frame():
+    frame = make_frame(2)
+    framer = FrameReassembler()
+    frames = []
+    for i in range(0, len(frame), 5):
+        frames += framer.feed(frame[i:i + 5])
+    assert [bytes(f) for f in frames] == [frame]
+    assert len(framer) == 0
+
+
+def test_framer_coalesced_frames():
+    frames = [make_frame(n, seed=n) for n in (1, 2, 3)]
+    framer = FrameReassembler()
+    assert [bytes(f) for f in framer.feed(b"".join(frames))] == frames
+
+
+def test_framer_skips_garbage():
+    frame = make_frame(2)
+    corrupt = bytearray(frame)
+    corrupt[-2] ^= 0xFF  # Bad checksum
+    framer = FrameReassembler()
+    chunk = b"\x00\x16garbage\x68\x68" + bytes(corrupt) + frame + b"\x68\xff\xff\x68" + frame
+    assert [bytes(f) for f in framer.feed(chunk)] == [frame, frame]
+    assert framer.discarded_bytes > 0
+    assert len(framer) == 0
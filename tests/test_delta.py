@@ -0,0 +1,69 @@
+from envertech_local.delta import KEYFRAME_KEY, DeltaEncoder
+
+
+def changes(encoder, *updates):
+    return [encoder.encode(update) for update in updates]
+
+
+def test_first_update_is_keyframe():
+    encoder = DeltaEncoder()
+    assert encoder.encode({"0_power": 100.0}) == {"0_power": 100.0, KEYFRAME_KEY: True}
+
+
+def test_no_deadband_emits_every_change():
+    encoder = DeltaEncoder()
+    _, same, moved = changes(encoder, {"0_power": 100.0}, {"0_power": 100.0}, {"0_power": 100.1})
+    assert same == {}
+    assert moved == {"0_power": 100.1, KEYFRAME_KEY: False}
+
+
+def test_absolute_deadband():
+    encoder = DeltaEncoder({"power": 2.0})
+    _, inside, edge, outside = changes(
+        encoder, {"0_power": 100.0}, {"0_power": 101.5}, {"0_power": 102.0}, {"0_power": 102.5}
+    )
+    assert inside == {} and edge == {}
+    assert outside == {"0_power": 102.5, KEYFRAME_KEY: False}
+
+
+def test_relative_deadband():
+    encoder = DeltaEncoder(relative_deadbands={"energy": 0.01})
+    _, inside, outside = changes(encoder, {"0_energy": 1000.0}, {"0_energy": 1009.0}, {"0_energy": 1011.0})
+    assert inside == {}
+    assert outside == {"0_energy": 1011.0, KEYFRAME_KEY: False}
+
+
+def test_leaving_either_deadband_emits():
+    # 1% of 1000 W is 10 W, tighter than the absolute 50 W
+    encoder = DeltaEncoder({"power": 50.0}, {"power": 0.01})
+    _, inside, past_relative = changes(encoder, {"0_power": 1000.0}, {"0_power": 1005.0}, {"0_power": 1020.0})
+    assert inside == {}
+    assert past_relative == {"0_power": 1020.0, KEYFRAME_KEY: False}
+
+    # 1% of 1000 W is 10 W, looser than the absolute 2 W
+    encoder = DeltaEncoder({"power": 2.0}, {"power": 0.01})
+    _, inside, past_absolute = changes(encoder, {"0_power": 1000.0}, {"0_power": 1001.0}, {"0_power": 1005.0})
+    assert inside == {}
+    assert past_absolute == {"0_power": 1005.0, KEYFRAME_KEY: False}
+
+
+def test_drift_is_compared_with_last_emitted_value():
+    encoder = DeltaEncoder({"power": 2.0})
+    results = changes(encoder, {"0_power": 100.0}, {"0_power": 101.0}, {"0_power": 102.0}, {"0_power": 103.0})
+    assert results[1:] == [{}, {}, {"0_power": 103.0, KEYFRAME_KEY: False}]
+
+
+def test_keyframe_cadence():
+    encoder = DeltaEncoder(keyframe_every=3)
+    results = changes(encoder, *({"0_power": float(i)} for i in range(7)))
+    assert [result[KEYFRAME_KEY] for result in results] == [True, False, False, True, False, False, True]
+
+
+def test_reset_forces_keyframe():
+    encoder = DeltaEncoder({"power": 5.0})
+    changes(encoder, {"0_power": 100.0}, {"0_power": 200.0})
+    encoder.reset()
+    assert encoder.encode({"0_power": 200.0, "0_mi_sn": "30800000"}) == {
+        "0_power": 200.0, "0_mi_sn": "30800000", KEYFRAME_KEY: True
+    }
+    assert encoder.encode({"0_power": 201.0, "0_mi_sn": "30800000"}) == {}
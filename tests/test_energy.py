@@ -0,0 +1,54 @@
+import pytest
+
+from envertech_local.energy import ENERGY_WRAP, EnergyAggregator
+
+SERIAL = "30801234"
+
+
+def feed(energies, power=100.0):
+    aggregator = EnergyAggregator()
+    for i, energy in enumerate(energies):
+        aggregator.add(SERIAL, {
+            "0_mi_sn": "30801234",
+            "0_input_voltage": 35.0,
+            "0_power": power,
+            "0_energy": energy,
+            "0_temperature": 30.0,
+            "0_grid_voltage": 230.0,
+            "0_frequency": 50.0,
+        }, timestamp=1_700_000_000 + i)
+    return aggregator, aggregator.module(SERIAL, "30801234")
+
+
+def test_increasing_counter():
+    _, module = feed([500.0, 500.1, 500.3])
+    assert module.daily_yield == pytest.approx(0.3)
+    assert module.resets == module.rollovers == 0
+
+
+def test_glitch_to_zero_is_not_a_reset():
+    aggregator, module = feed([500.0, 500.1, 0.0, 500.2])
+    assert module.daily_yield == pytest.approx(0.2)
+    assert module.energy == 500.2
+    assert module.resets == 0
+    assert aggregator.device_totals(SERIAL)["daily_yield"] == pytest.approx(0.2)
+
+
+def test_repeated_glitch_is_not_a_reset():
+    _, module = feed([500.0, 0.0, 0.0, 0.0, 500.1])
+    assert module.daily_yield == pytest.approx(0.1)
+    assert module.resets == 0
+
+
+def test_reset_confirmed_by_counting_up():
+    _, module = feed([500.0, 500.1, 0.1, 0.3, 0.4])
+    assert module.daily_yield == pytest.approx(0.1 + 0.3 + 0.1)
+    assert module.resets == 1
+    assert module.energy == 0.4
+
+
+def test_rollover():
+    _, module = feed([ENERGY_WRAP - 0.2, 0.3])
+    assert module.daily_yield == pytest.approx(0.5)
+    assert module.rollovers == 1
+    assert module.resets == 0
@@ -0,0 +1,46 @@
+from envertech_local import BatchExporter, ConnectionEvent
+from envertech_local.reconnect import CONNECTED
+
+
+class ListWriter:
+    def __init__(self):
+        self.rows = []
+        self.closed = False
+
+    def write_batch(self, rows):
+        self.rows.extend(rows)
+
+    def close(self):
+        self.closed = True
+
+
+def module_dict(index, power):
+    return {
+        f"{index}_mi_sn": f"3080000{index}",
+        f"{index}_input_voltage": 35.0,
+        f"{index}_power": power,
+        f"{index}_energy": 100.0,
+        f"{index}_temperature": 30.0,
+        f"{index}_grid_voltage": 230.0,
+        f"{index}_frequency": 50.0,
+    }
+
+
+def test_non_readings_are_ignored():
+    writer = ListWriter()
+    with BatchExporter(writer) as exporter:
+        exporter.submit("30800000", ConnectionEvent("30800000", CONNECTED))
+        exporter.submit("30800000", {})
+        exporter.submit("30800000", {"error": "Receiver failed"})
+        exporter.submit("30800000", module_dict(0, 120.0), timestamp=1.0)
+    assert writer.closed
+    assert [row[:4] for row in writer.rows] == [(1.0, "30800000", "30800000", 35.0)]
+
+
+def test_bad_reading_does_not_stop_exporter():
+    writer = ListWriter()
+    exporter = BatchExporter(writer, max_delay=0.01)
+    exporter._queue.put((1.0, "30800000", object()))  # Bypasses the check in submit()
+    exporter.submit("30800000", module_dict(3, 200.0), timestamp=2.0)
+    exporter.close()
+    assert [row[:3] for row in writer.rows] == [(2.0, "30800000", "30800003")]
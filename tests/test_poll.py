@@ -0,0 +1,126 @@
+import asyncio
+
+from envertech_local import SessionPool, poll_inverter
+from envertech_local.framing import FrameReassembler
+from envertech_local.simulator import InverterSimulator, VirtualInverter, create_fleet
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class ConcurrentServer:
+    """Answers data requests concurrently, the n-th request of a connection after delays[n]."""
+
+    def __init__(self, delays):
+        self.device = VirtualInverter("30800000")
+        self.delays = delays
+        self.connections = 0
+        self.requests = 0
+        self.port = None
+        self._server = None
+
+    async def __aenter__(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc):
+        self._server.close()
+
+    async def _answer(self, writer, delay):
+        await asyncio.sleep(delay)
+        if not writer.is_closing():
+            writer.write(self.device.data_frame())
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        framer = FrameReassembler()
+        tasks = []
+        count = 0
+        try:
+            while chunk := await reader.read(4096):
+                for frame in framer.feed(chunk):
+                    if int.from_bytes(frame[4:6], "big") == 4215:
+                        self.requests += 1
+                        tasks.append(asyncio.create_task(self._answer(writer, self.delays[count % len(self.delays)])))
+                        count += 1
+        except ConnectionError:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+
+def test_hedged_answer_is_drained_and_connection_kept():
+    async def main():
+        # The first request of each pair is slow, the hedged one fast
+        async with ConcurrentServer([0.15, 0.0]) as server:
+            device = {"ip": "127.0.0.1", "serial_number": "30800000"}
+            async with SessionPool() as pool:
+                results = [
+                    await poll_inverter(device, port=server.port, hedge_after=0.1, pool=pool, deadline=2)
+                    for _ in range(3)
+                ]
+            return server, results
+
+    server, results = run(main())
+    assert all(result.ok and result.attempts == 2 for result in results)
+    # Every poll waited for its own answer instead of taking a leftover one
+    assert all(result.elapsed >= 0.09 for result in results)
+    assert server.requests == 6
+    assert server.connections == 1
+
+
+def test_missing_hedged_answer_drops_pooled_connection():
+    async def main():
+        # Answers come in request order, so the hedged one is too late to drain
+        async with InverterSimulator(create_fleet(1, latency=0.2)) as sim:
+            device = sim.device_list()[0]
+            async with SessionPool() as pool:
+                results = [
+                    await poll_inverter(device, port=sim.port, hedge_after=0.05, pool=pool, deadline=2)
+                    for _ in range(3)
+                ]
+            return sim, results
+
+    sim, results = run(main())
+    assert all(result.ok and result.attempts == 2 for result in results)
+    assert all(result.elapsed >= 0.19 for result in results)
+    assert sim.connections == 3
+
+
+def test_deadline_drops_pooled_connection():
+    async def main():
+        async with InverterSimulator(create_fleet(1, drop_rate=1.0)) as sim:
+            device = sim.device_list()[0]
+            async with SessionPool() as pool:
+                results = [
+                    await poll_inverter(device, port=sim.port, hedge_after=0.05, pool=pool, deadline=0.2)
+                    for _ in range(2)
+                ]
+            return sim, results
+
+    sim, results = run(main())
+    for result in results:
+        assert not result.ok
+        assert result.error == "No data within 0.2s"
+        assert result.attempts == 2
+        assert result.elapsed < 0.3
+    assert sim.connections == 2
+
+
+def test_no_data_answers_are_retried():
+    async def main():
+        async with InverterSimulator(create_fleet(1, no_data_rate=0.5, seed=2)) as sim:
+            device = sim.device_list()[0]
+            async with SessionPool() as pool:
+                results = [await poll_inverter(device, port=sim.port, pool=pool, deadline=5) for _ in range(4)]
+            return sim, results
+
+    sim, results = run(main())
+    assert all(result.ok and result.control_code == 4177 for result in results)
+    assert any(result.attempts > 1 for result in results)
+    assert sum(result.attempts for result in results) == sim.devices[bytes.fromhex("30800000")].requests
+    assert sim.connections == 1
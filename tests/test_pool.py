@@ -0,0 +1,77 @@
+import asyncio
+
+from envertech_local import SessionPool, get_inverter_data, stream_inverter_data
+from envertech_local.simulator import InverterSimulator, create_fleet
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_pool_reusable_right_after_closing_stream():
+    async def main():
+        async with InverterSimulator(create_fleet(1)) as sim:
+            device = sim.device_list()[0]
+            async with SessionPool() as pool:
+                stream = stream_inverter_data(device, port=sim.port, interval=0.05, pool=pool)
+                assert await stream.__anext__()
+                await stream.aclose()
+
+                data, panel_count, control_code = await get_inverter_data(device, port=sim.port, pool=pool)
+                assert panel_count == 2 and control_code == 4177
+                assert len(pool) == 1
+            return sim.connections
+
+    assert run(main()) == 1
+
+
+def stream_tasks():
+    return [
+        task for task in asyncio.all_tasks()
+        if task.get_coro().__qualname__.startswith("_stream.") and not task.done()
+    ]
+
+
+def test_closing_stream_stops_its_tasks():
+    async def main():
+        async with InverterSimulator(create_fleet(1)) as sim:
+            device = sim.device_list()[0]
+            stream = stream_inverter_data(device, port=sim.port, interval=0.05)
+            assert await stream.__anext__()
+            assert len(stream_tasks()) == 2
+            await stream.aclose()
+            return stream_tasks()
+
+    assert run(main()) == []
+
+
+def test_cancelled_borrower_drops_connection():
+    async def main():
+        async with InverterSimulator(create_fleet(1, latency=0.2)) as sim:
+            device = sim.device_list()[0]
+            async with SessionPool() as pool:
+                try:
+                    await asyncio.wait_for(get_inverter_data(device, port=sim.port, pool=pool), 0.05)
+                except asyncio.TimeoutError:
+                    pass
+                data, panel_count, _ = await get_inverter_data(device, port=sim.port, pool=pool)
+                assert panel_count == 2
+            return sim.connections
+
+    assert run(main()) == 2
+
+
+def test_close_does_not_wait_for_running_stream():
+    async def main():
+        async with InverterSimulator(create_fleet(1)) as sim:
+            device = sim.device_list()[0]
+            pool = SessionPool()
+            stream = stream_inverter_data(device, port=sim.port, interval=0.05, pool=pool)
+            assert await stream.__anext__()
+            await asyncio.wait_for(pool.close(), 1)
+            async for data in stream:
+                if "error" in data:
+                    break
+            assert len(pool) == 0
+
+    run(main())
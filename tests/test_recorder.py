@@ -0,0 +1,17 @@
+from envertech_local.commands import build_inverter_command
+from envertech_local.recorder import FrameLog, FrameRecorder
+
+SERIAL = "30801234"
+
+
+def test_close_with_frames_still_referenced(tmp_path):
+    path = str(tmp_path / "frames.log")
+    frame = build_inverter_command(SERIAL, 4102, payload_padding=10)
+    with FrameRecorder(path) as recorder:
+        for i in range(3):
+            recorder.write(frame, SERIAL, timestamp=float(i))
+
+    with FrameLog(path) as log:
+        records = list(log.frames(start=1.0))
+    assert [(ts, sn, cc) for ts, sn, cc, _ in records] == [(1.0, SERIAL, 4102), (2.0, SERIAL, 4102)]
+    assert bytes(records[-1][3]) == frame